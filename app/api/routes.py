@@ -72,15 +72,22 @@
 
 
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+import hmac
+import json
 import logging
 
-from app.services.rag_service import RAGService
+from app.services.admission import AdmissionRejected, TokenBucketLimiter
+from app.services.rag_service import RAGService, ServiceNotReady
+from config.settings import Config
 
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint('api', __name__)
-rag_service = RAGService()
+# Preloading servers load the corpus in the master so forked workers share it
+rag_service = RAGService(background=not Config.CORPUS_PRELOAD)
+# Per-client request budget on the completion routes, shared with the ASGI entry point
+rate_limiter = TokenBucketLimiter(Config.RATE_LIMIT_PER_MINUTE, Config.RATE_LIMIT_BURST)
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -91,39 +98,91 @@ def health_check():
         'version': '1.0.0'
     })
 
+@api_bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: corpus load progress and version"""
+    status = rag_service.readiness()
+    if status['ready']:
+        return jsonify(status)
+    return jsonify(status), 503, {'Retry-After': str(Config.READY_RETRY_AFTER)}
+
+def not_ready_response(error):
+    """503 telling the client to retry once the corpus has loaded"""
+    response = jsonify({'error': 'Service not ready', 'message': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(Config.READY_RETRY_AFTER)
+    return response
+
+def rejected_response(error):
+    """429 or 503 telling the client when to retry"""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = error.status
+    response.headers['Retry-After'] = error.retry_after_header
+    return response
+
+def request_cost(data) -> int:
+    """Rate-limit tokens a completion body takes: one per batch item, otherwise one"""
+    items = data.get('requests') if isinstance(data, dict) else None
+    return len(items) if isinstance(items, list) and items else 1
+
+RATE_LIMITED_ENDPOINTS = {'api.rag_completion', 'api.rag_completion_stream', 'api.rag_completion_batch'}
+
+@api_bp.before_request
+def enforce_rate_limit():
+    """429 once the client's token bucket is empty"""
+    if request.endpoint in RATE_LIMITED_ENDPOINTS:
+        try:
+            rate_limiter.check(request.remote_addr, request_cost(request.get_json(silent=True)))
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+def validate_completion_request(data):
+    """Simple validation without marshmallow; returns (params, error message)"""
+    if not isinstance(data, dict) or 'query' not in data or 'language' not in data:
+        return None, 'Missing required fields: query, language'
+    
+    query = data['query']
+    language = data['language']
+    top_k = data.get('top_k', 3)
+    
+    # Basic validation
+    if not isinstance(query, str) or not query.strip():
+        return None, 'Query cannot be empty'
+    
+    if language not in ['fulfulde', 'ghomala', 'english', 'french']:
+        return None, 'Unsupported language'
+    
+    if not isinstance(top_k, int) or top_k < 1 or top_k > 10:
+        return None, 'top_k must be between 1 and 10'
+    
+    use_cache = data.get('use_cache', True)
+    if not isinstance(use_cache, bool):
+        return None, 'use_cache must be a boolean'
+    
+    return {'query': query, 'language': language, 'top_k': top_k, 'use_cache': use_cache}, None
+
 @api_bp.route('/rag/completion', methods=['POST'])
 def rag_completion():
     """Core RAG completion endpoint"""
     try:
-        # Simple validation without marshmallow
-        data = request.json
-        
-        if not data or 'query' not in data or 'language' not in data:
-            return jsonify({'error': 'Missing required fields: query, language'}), 400
-        
-        query = data['query']
-        language = data['language']
-        top_k = data.get('top_k', 3)
-        
-        # Basic validation
-        if not query.strip():
-            return jsonify({'error': 'Query cannot be empty'}), 400
-        
-        if language not in ['fulfulde', 'ghomala', 'english', 'french']:
-            return jsonify({'error': 'Unsupported language'}), 400
-        
-        if not isinstance(top_k, int) or top_k < 1 or top_k > 10:
-            return jsonify({'error': 'top_k must be between 1 and 10'}), 400
+        params, error = validate_completion_request(request.json)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Process RAG completion
         result = rag_service.get_completion(
-            query=query,
-            language=language,
-            top_k=top_k
+            query=params['query'],
+            language=params['language'],
+            top_k=params['top_k'],
+            use_cache=params['use_cache']
         )
         
         return jsonify(result)
-        
+    
+    except ServiceNotReady as e:
+        return not_ready_response(e)
+    except AdmissionRejected as e:
+        return rejected_response(e)
     except Exception as e:
         logger.error(f"Error in RAG completion endpoint: {str(e)}")
         return jsonify({
@@ -131,6 +190,91 @@ def rag_completion():
             'message': 'Failed to process request'
         }), 500
 
+@api_bp.route('/rag/completion/stream', methods=['POST'])
+def rag_completion_stream():
+    """Streaming RAG completion endpoint (Server-Sent Events)"""
+    params, error = validate_completion_request(request.json)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Readiness is checked before the 200 and the event stream start
+    try:
+        rag_service.ensure_ready()
+    except ServiceNotReady as e:
+        return not_ready_response(e)
+    
+    events = rag_service.stream_completion(
+        query=params['query'],
+        language=params['language'],
+        top_k=params['top_k'],
+        use_cache=params['use_cache']
+    )
+    return Response(
+        format_sse(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def format_sse(events):
+    """Encode (event, data) pairs as Server-Sent Events"""
+    for event, data in events:
+        yield encode_sse(event, data)
+
+def encode_sse(event, data):
+    """One Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def validate_batch_request(data):
+    """Validate a batch body; returns (results with per-item errors filled in, [(position, params)], error)"""
+    items = data.get('requests') if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return None, None, 'Missing required field: requests (non-empty list)'
+    
+    if len(items) > Config.MAX_BATCH_SIZE:
+        return None, None, f'At most {Config.MAX_BATCH_SIZE} requests per batch'
+    
+    # Invalid items get an error entry, valid ones go to the service together
+    results = [None] * len(items)
+    valid = []
+    for position, item in enumerate(items):
+        params, error = validate_completion_request(item)
+        if error:
+            item = item if isinstance(item, dict) else {}
+            results[position] = {
+                'error': error,
+                'query': item.get('query'),
+                'language': item.get('language')
+            }
+        else:
+            valid.append((position, params))
+    
+    return results, valid, None
+
+@api_bp.route('/rag/completion/batch', methods=['POST'])
+def rag_completion_batch():
+    """Batch RAG completion endpoint; one result per request item, in order"""
+    try:
+        results, valid, error = validate_batch_request(request.json)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        if valid:
+            completions = rag_service.get_completions([params for _, params in valid])
+            for (position, _), completion in zip(valid, completions):
+                results[position] = completion
+        
+        return jsonify({'results': results})
+    
+    except ServiceNotReady as e:
+        return not_ready_response(e)
+    except Exception as e:
+        logger.error(f"Error in RAG batch completion endpoint: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'Failed to process request'
+        }), 500
+
 @api_bp.route('/languages', methods=['GET'])
 def get_supported_languages():
     """Get list of supported languages"""
@@ -144,18 +288,58 @@ def get_supported_languages():
 def debug_rag_components():
     """Debug endpoint to check RAG components status"""
     try:
-        has_metadata = hasattr(rag_service, 'metadata') and len(rag_service.metadata) > 0
+        corpus = rag_service.corpus
+        has_metadata = len(corpus.metadata) > 0
         
         return jsonify({
             'rag_components_loaded': has_metadata,
             'has_metadata': has_metadata,
-            'metadata_count': len(rag_service.metadata) if has_metadata else 0,
-            'supported_languages': list(set([item.get('language', 'unknown') for item in rag_service.metadata])) if has_metadata else []
+            'metadata_count': len(corpus.metadata) if has_metadata else 0,
+            'supported_languages': corpus.metadata.languages() if has_metadata else [],
+            'corpus_version': corpus.version,
+            'reload': rag_service.readiness()['reload']
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
         
 
+@api_bp.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Rebuild the corpus in the background and swap it in; this process only"""
+    if not Config.ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled'}), 403
+    
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {Config.ADMIN_TOKEN}'.encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    started = rag_service.reload_corpus()
+    return jsonify({
+        'reloading': started,
+        'message': 'Reload started' if started else 'A reload is already in progress',
+        'corpus_version': rag_service.corpus_version
+    }), 202 if started else 409
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Response cache hit/miss and generation coalescing counters"""
+    cache = rag_service.response_cache
+    semantic_cache = rag_service.semantic_cache
+    return jsonify({
+        'response_cache': cache.stats() if cache is not None else {'enabled': False},
+        'semantic_cache': semantic_cache.stats() if semantic_cache is not None else {'enabled': False},
+        'single_flight': rag_service.single_flight.stats()
+    })
+
+@api_bp.route('/admission/stats', methods=['GET'])
+def admission_stats():
+    """Rate limiting and generation load-shedding counters"""
+    return jsonify({
+        'rate_limit': rate_limiter.stats(),
+        'generation_gate': rag_service.generation_gate.stats(),
+        'async_generations': rag_service.async_client.stats()
+    })
+
 @api_bp.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
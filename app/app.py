@@ -1,10 +1,16 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from config.settings import config
+from app.services.metrics import CONTENT_TYPE, registry
 import logging
 import os
+import time
 from datetime import datetime
 
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route and status', ('method', 'endpoint', 'status')
+)
+
 def create_app(config_name=None):
     """Application factory"""
     if config_name is None:
@@ -98,6 +104,7 @@ def register_middleware(app):
     
     @app.before_request
     def log_request_info():
+        g.request_started = time.perf_counter()
         if not app.debug:
             app.logger.info(f'{request.method} {request.url} - {request.remote_addr}')
     
@@ -111,6 +118,13 @@ def register_middleware(app):
         if not app.debug:
             app.logger.info(f'{request.method} {request.url} - {response.status_code}')
         
+        # Streams are timed until their first byte
+        if 'request_started' in g:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - g.request_started,
+                request.method, request.endpoint or 'unmatched', str(response.status_code)
+            )
+        
         return response
     
     @app.route('/health')
@@ -121,4 +135,11 @@ def register_middleware(app):
             'service': 'Nerala RAG Backend',
             'version': '1.0.0',
             'timestamp': datetime.utcnow().isoformat()
-        })
\ No newline at end of file
+        })
+    
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics of this process"""
+        if not app.config['METRICS_ENABLED']:
+            return jsonify({'error': 'Not found', 'message': 'Endpoint not found'}), 404
+        return Response(registry.render(), content_type=CONTENT_TYPE)
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""ASGI entry point
+
+    uvicorn app.asgi:app --host 0.0.0.0 --port 8000
+
+The completion routes of api_bp run natively on the event loop, so a slow
+generation holds a coroutine and a slot of the async model client instead of
+an OS thread. Every other route is served by the regular Flask app through
+asgiref's WSGI adapter, with unchanged behaviour.
+"""
+import fnmatch
+import json
+import logging
+import os
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from app.app import REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+flask_app = create_app(os.getenv('FLASK_ENV', 'default'))
+wsgi_app = WsgiToAsgi(flask_app)
+
+# Imported after create_app so the blueprint (and its RAGService) is shared
+from app.api.routes import (  # noqa: E402
+    api_bp, encode_sse, rag_service, rate_limiter, request_cost, validate_batch_request, validate_completion_request
+)
+from app.services.admission import AdmissionRejected  # noqa: E402
+from app.services.rag_service import ServiceNotReady  # noqa: E402
+from config.settings import Config  # noqa: E402
+
+API_PREFIX = f"/api/{flask_app.config['API_VERSION']}"
+
+SECURITY_HEADERS = [
+    (b'x-content-type-options', b'nosniff'),
+    (b'x-frame-options', b'DENY'),
+    (b'x-xss-protection', b'1; mode=block'),
+]
+
+
+class HTTPError(Exception):
+    """Error response raised while reading a request"""
+
+    def __init__(self, status: int, payload: dict, headers: list = None):
+        super().__init__(payload.get('error'))
+        self.status = status
+        self.payload = payload
+        self.headers = headers or []
+
+
+async def app(scope, receive, send):
+    """ASGI application: native completion routes, Flask for the rest"""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    if scope['type'] == 'http' and scope['method'] == 'POST':
+        handler = NATIVE_ROUTES.get(scope['path'])
+        if handler is not None:
+            send = _timed_send(send, f'{api_bp.name}.{handler.__name__}')
+            try:
+                return await handler(scope, receive, send)
+            except HTTPError as e:
+                return await _send_json(scope, send, e.status, e.payload, e.headers)
+
+    return await wsgi_app(scope, receive, send)
+
+
+async def rag_completion(scope, receive, send):
+    """Core RAG completion endpoint"""
+    params, error = validate_completion_request(await _read_admitted_json(scope, receive))
+    if error:
+        return await _send_json(scope, send, 400, {'error': error})
+
+    try:
+        result = await rag_service.get_completion_async(**params)
+    except ServiceNotReady as e:
+        raise _not_ready(e)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    except Exception as e:
+        logger.error(f"Error in RAG completion endpoint: {str(e)}")
+        return await _send_json(scope, send, 500, {
+            'error': 'Internal server error',
+            'message': 'Failed to process request'
+        })
+    return await _send_json(scope, send, 200, result)
+
+
+async def rag_completion_batch(scope, receive, send):
+    """Batch RAG completion endpoint; one result per request item, in order"""
+    results, valid, error = validate_batch_request(await _read_admitted_json(scope, receive))
+    if error:
+        return await _send_json(scope, send, 400, {'error': error})
+
+    try:
+        if valid:
+            completions = await rag_service.get_completions_async([params for _, params in valid])
+            for (position, _), completion in zip(valid, completions):
+                results[position] = completion
+    except ServiceNotReady as e:
+        raise _not_ready(e)
+    except Exception as e:
+        logger.error(f"Error in RAG batch completion endpoint: {str(e)}")
+        return await _send_json(scope, send, 500, {
+            'error': 'Internal server error',
+            'message': 'Failed to process request'
+        })
+    return await _send_json(scope, send, 200, {'results': results})
+
+
+async def rag_completion_stream(scope, receive, send):
+    """Streaming RAG completion endpoint (Server-Sent Events)"""
+    params, error = validate_completion_request(await _read_admitted_json(scope, receive))
+    if error:
+        return await _send_json(scope, send, 400, {'error': error})
+
+    # Readiness is checked before the 200 and the event stream start
+    try:
+        await rag_service.ensure_ready_async()
+    except ServiceNotReady as e:
+        raise _not_ready(e)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': _response_headers(scope, b'text/event-stream') + [
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    async for event, data in rag_service.stream_completion_async(**params):
+        await send({
+            'type': 'http.response.body',
+            'body': encode_sse(event, data).encode('utf-8'),
+            'more_body': True,
+        })
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+NATIVE_ROUTES = {
+    f'{API_PREFIX}/rag/completion': rag_completion,
+    f'{API_PREFIX}/rag/completion/batch': rag_completion_batch,
+    f'{API_PREFIX}/rag/completion/stream': rag_completion_stream,
+}
+
+
+async def _read_json(scope, receive):
+    """Read and decode the request body, enforcing MAX_CONTENT_LENGTH"""
+    limit = flask_app.config['MAX_CONTENT_LENGTH']
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise HTTPError(400, {'error': 'Bad request', 'message': 'Client disconnected'})
+        body.extend(message.get('body', b''))
+        if len(body) > limit:
+            raise HTTPError(413, {'error': 'Request too large', 'message': 'Request size exceeds limit'})
+        if not message.get('more_body', False):
+            break
+
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        raise HTTPError(400, {'error': 'Bad request', 'message': 'Invalid JSON body'})
+
+
+async def _read_admitted_json(scope, receive):
+    """Read the body, then take its cost from the client's token bucket"""
+    data = await _read_json(scope, receive)
+    client = scope.get('client')
+    try:
+        rate_limiter.check(client[0] if client else None, request_cost(data))
+    except AdmissionRejected as e:
+        raise _rejected(e)
+    return data
+
+
+def _rejected(error: AdmissionRejected) -> HTTPError:
+    """429 or 503 telling the client when to retry"""
+    return HTTPError(
+        error.status,
+        {'error': str(error), 'retry_after': error.retry_after},
+        [(b'retry-after', error.retry_after_header.encode('ascii'))]
+    )
+
+
+def _timed_send(send, endpoint: str):
+    """Wrap send to record the request latency when the response starts, as the Flask middleware does"""
+    started = time.perf_counter()
+
+    async def timed_send(message):
+        if message['type'] == 'http.response.start':
+            REQUEST_SECONDS.observe(time.perf_counter() - started, 'POST', endpoint, str(message['status']))
+        await send(message)
+
+    return timed_send
+
+
+def _not_ready(error) -> HTTPError:
+    """503 telling the client to retry once the corpus has loaded"""
+    return HTTPError(
+        503,
+        {'error': 'Service not ready', 'message': str(error)},
+        [(b'retry-after', str(Config.READY_RETRY_AFTER).encode('ascii'))]
+    )
+
+
+async def _send_json(scope, send, status: int, payload, extra_headers: list = None):
+    """Send a complete JSON response"""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': _response_headers(scope, b'application/json') + (extra_headers or []) + [
+            (b'content-length', str(len(body)).encode('ascii')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _response_headers(scope, content_type: bytes) -> list:
+    """Content type, the security headers added by the Flask middleware, and CORS"""
+    headers = [(b'content-type', content_type)] + SECURITY_HEADERS
+
+    origin = dict(scope.get('headers', [])).get(b'origin')
+    if origin is not None:
+        origin_text = origin.decode('latin-1')
+        if any(fnmatch.fnmatch(origin_text, pattern) for pattern in flask_app.config['CORS_ORIGINS']):
+            headers += [(b'access-control-allow-origin', origin), (b'vary', b'Origin')]
+    return headers
+
+
+async def _lifespan(receive, send):
+    """Minimal lifespan protocol; the service is created at import time"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,164 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Request refused before doing the work; the client should retry after retry_after seconds"""
+
+    status = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value: whole seconds, at least 1"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimited(AdmissionRejected):
+    """The client has used up its token bucket"""
+
+    status = 429
+
+
+class Overloaded(AdmissionRejected):
+    """Every generation slot is busy and the wait queue is full, or the wait timed out"""
+
+    status = 503
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets
+
+    Each client gets `burst` tokens, refilled at rate_per_minute / 60 tokens a
+    second, and every request takes `cost` of them. Buckets of the least
+    recently seen clients are dropped beyond max_clients; such a client
+    starts again with a full bucket. rate_per_minute <= 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: float = None, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst if burst else rate_per_minute
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str, cost: float = 1.0):
+        """Take cost tokens from client's bucket, or raise RateLimited"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            # A request costing more than the burst can never pass; charge it the whole bucket
+            cost = min(cost, self.burst)
+            admitted = tokens >= cost
+            if admitted:
+                tokens -= cost
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+            if admitted:
+                self.allowed += 1
+                return
+            self.limited += 1
+        raise RateLimited('Rate limit exceeded', (cost - tokens) / self.rate)
+
+    def stats(self) -> dict:
+        """Admission counters"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'rate_per_minute': self.rate * 60,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'allowed': self.allowed,
+                'limited': self.limited
+            }
+
+
+class GenerationGate:
+    """Global cap on in-flight model generations with a bounded wait queue
+
+    At most max_concurrent generations run at once. Up to max_waiting more
+    wait for a slot, for at most wait_timeout seconds; beyond that callers get
+    Overloaded straight away instead of tying up a server thread. Only model
+    calls go through the gate, so cache hits, direct answers and retrieval are
+    never queued behind cold generations.
+    """
+
+    def __init__(self, max_concurrent: int, max_waiting: int, wait_timeout: float, retry_after: float):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def check_capacity(self):
+        """Raise Overloaded if a new generation would be rejected right now"""
+        with self._condition:
+            if self._full():
+                self.rejected += 1
+                raise Overloaded('Too many generations in progress', self.retry_after)
+
+    @contextmanager
+    def slot(self):
+        """Hold one generation slot for the duration of the block"""
+        with self._condition:
+            if self._full():
+                self.rejected += 1
+                raise Overloaded('Too many generations in progress', self.retry_after)
+            if self.in_flight >= self.max_concurrent:
+                self.waiting += 1
+                try:
+                    acquired = self._condition.wait_for(
+                        lambda: self.in_flight < self.max_concurrent, self.wait_timeout
+                    )
+                finally:
+                    self.waiting -= 1
+                if not acquired:
+                    self.timeouts += 1
+                    raise Overloaded(f'No generation slot within {self.wait_timeout}s', self.retry_after)
+            self.in_flight += 1
+            self.admitted += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def _full(self) -> bool:
+        # Condition held
+        return self.in_flight >= self.max_concurrent and self.waiting >= self.max_waiting
+
+    def stats(self) -> dict:
+        """Concurrency gauges and rejection counters"""
+        with self._condition:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_waiting': self.max_waiting,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts
+            }
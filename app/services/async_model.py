@@ -0,0 +1,95 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.services.admission import Overloaded
+
+
+class AsyncModelClient:
+    """Async access to the generative model with bounded upstream concurrency
+
+    Uses the SDK's native async calls when the model provides them, otherwise
+    runs the blocking call on the default executor. Either way at most
+    max_concurrency generations are in flight; the rest wait on a semaphore,
+    not on a thread. At most max_waiting calls wait, for up to wait_timeout
+    seconds; beyond that they fail fast with Overloaded.
+    """
+
+    def __init__(self, max_concurrency: int, max_waiting: int = None, wait_timeout: float = None,
+                 retry_after: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self._semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def generate_text(self, model, prompt: str) -> str:
+        """Generate a complete response and return its text"""
+        async with self._slot():
+            if hasattr(model, 'generate_content_async'):
+                response = await model.generate_content_async(prompt)
+            else:
+                response = await asyncio.to_thread(model.generate_content, prompt)
+            return response.text
+
+    async def stream_text(self, model, prompt: str):
+        """Async iterator over generated text chunks; holds one slot for the whole stream"""
+        async with self._slot():
+            if hasattr(model, 'generate_content_async'):
+                response = await model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    yield chunk.text
+            else:
+                chunks = await asyncio.to_thread(lambda: iter(model.generate_content(prompt, stream=True)))
+                while True:
+                    chunk = await asyncio.to_thread(next, chunks, None)
+                    if chunk is None:
+                        break
+                    yield chunk.text
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one upstream slot, keeping the in-flight and waiting gauges"""
+        semaphore = self._get_semaphore()
+        self.check_capacity()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise Overloaded(f'No generation slot within {self.wait_timeout}s', self.retry_after)
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def check_capacity(self):
+        """Raise Overloaded if a new generation would be rejected right now"""
+        if (self.max_waiting is not None and self.in_flight >= self.max_concurrency
+                and self.waiting >= self.max_waiting):
+            self.rejected += 1
+            raise Overloaded('Too many generations in progress', self.retry_after)
+
+    def stats(self) -> dict:
+        """Concurrency gauges and rejection counters"""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_waiting': self.max_waiting,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts
+        }
@@ -0,0 +1,112 @@
+"""Offline index builder
+
+Reads rag_data.json and writes a binary corpus directory with every retrieval
+artifact pre-computed, so RAGService only has to map files at startup.
+
+    python -m app.services.build_index --input rag_data.json --output data/corpus
+    python -m app.services.build_index --verify data/corpus
+
+Languages with at least ANN_MIN_DOCUMENTS rows also get an IVF index for
+approximate search, and EMBEDDING_STORAGE float16/int8 adds a compact block for
+the similarity scan. The recall of either, against exact float32 search, is
+logged after the build.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+import numpy as np
+
+from config.settings import Config
+from app.services.corpus_index import SCAN_STORAGES, build_language_indexes, search_recall
+from app.services.corpus_store import read_manifest, verify_corpus, write_corpus
+
+logger = logging.getLogger(__name__)
+
+
+def build_index(json_path: str, output_dir: str, ann_min_documents: int = None, ann_lists: int = None,
+                scan_storage: str = None) -> dict:
+    """Build all retrieval artifacts for rag_data.json into output_dir"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        rag_data = json.load(f)
+
+    embeddings = np.asarray(rag_data['embeddings'], dtype=np.float32)
+    metadata = rag_data['metadata']
+    language_indexes = build_language_indexes(
+        embeddings,
+        metadata,
+        Config.ANN_MIN_DOCUMENTS if ann_min_documents is None else ann_min_documents,
+        Config.ANN_LISTS if ann_lists is None else ann_lists,
+        Config.EMBEDDING_STORAGE if scan_storage is None else scan_storage
+    )
+
+    for language, index in language_indexes.items():
+        if index.ivf is not None or index.quantized is not None:
+            recall = search_recall(index, Config.MAX_TOP_K, Config.ANN_NPROBE, Config.RERANK_SHORTLIST)
+            logger.info(
+                f"{language}: {len(index)} documents, "
+                f"IVF lists {len(index.ivf) if index.ivf is not None else 0} (nprobe={Config.ANN_NPROBE}), "
+                f"scan {index.quantized.storage if index.quantized is not None else 'float32'} "
+                f"(shortlist={Config.RERANK_SHORTLIST}): recall@{Config.MAX_TOP_K} {recall:.3f}"
+            )
+
+    return write_corpus(
+        output_dir,
+        embeddings,
+        metadata,
+        rag_data.get('model_info', {}),
+        language_indexes=language_indexes
+    )
+
+
+def download_rag_json() -> str:
+    """Fetch rag_data.json from the Hugging Face model repo"""
+    from huggingface_hub import hf_hub_download
+
+    return hf_hub_download(
+        repo_id=Config.HF_REPO_ID,
+        filename="rag_data.json",
+        token=Config.HF_TOKEN
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Nerala RAG corpus index")
+    parser.add_argument('--input', help="Path to rag_data.json (downloaded from Hugging Face if omitted)")
+    parser.add_argument('--output', default=Config.CORPUS_DIR, help="Artifact directory to write")
+    parser.add_argument('--verify', metavar='DIR', help="Verify checksums of an existing artifact directory and exit")
+    parser.add_argument('--ann-min-documents', type=int, default=Config.ANN_MIN_DOCUMENTS,
+                        help="Build an IVF index for languages with at least this many documents (0 = none)")
+    parser.add_argument('--ann-lists', type=int, default=Config.ANN_LISTS,
+                        help="IVF lists per language (0 = about 4 * sqrt(documents))")
+    parser.add_argument('--storage', choices=SCAN_STORAGES, default=Config.EMBEDDING_STORAGE,
+                        help="Storage of the similarity scan block (float16/int8 are re-ranked in float32)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.verify:
+        try:
+            manifest = read_manifest(args.verify)
+            verify_corpus(args.verify, manifest)
+        except (OSError, ValueError) as e:
+            logger.error(f"Verification failed: {e}")
+            return 1
+        logger.info(f"{args.verify}: {len(manifest.get('checksums', {}))} files OK, "
+                    f"version {manifest.get('corpus_version')}")
+        return 0
+
+    json_path = args.input or download_rag_json()
+
+    start = time.perf_counter()
+    manifest = build_index(json_path, args.output, args.ann_min_documents, args.ann_lists, args.storage)
+    logger.info(
+        f"Built {manifest['num_documents']} documents in {len(manifest['languages'])} languages "
+        f"in {time.perf_counter() - start:.1f}s -> {args.output}"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
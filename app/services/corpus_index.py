@@ -0,0 +1,586 @@
+import hashlib
+import itertools
+import string
+import unicodedata
+import numpy as np
+
+from app.services.metadata_store import MetadataStore
+
+# Lexical fields indexed per document; 'text' is phrase and translation together
+TOKEN_FIELDS = ('phrase', 'translation', 'text')
+
+# IVF training: sampled rows per coarse list, k-means iterations, rows per scoring chunk
+IVF_TRAINING_ROWS_PER_LIST = 32
+IVF_TRAINING_ITERATIONS = 10
+IVF_CHUNK_ROWS = 65536
+
+# Compact scan storage choices, and rows decoded to float32 at a time while scanning
+SCAN_STORAGES = ('float32', 'float16', 'int8')
+SCAN_CHUNK_ROWS = 4096
+
+# Exact-match lookup: fields a term is compared with, in the order used to encode entries
+LOOKUP_FIELDS = ('phrase', 'translation')
+
+# Fuzzy term matching: candidates by shared trigrams re-ranked by edit distance
+FUZZY_CANDIDATES = 32
+
+# Hybrid ranking: ways of fusing lexical and semantic scores
+FUSION_METHODS = ('weighted', 'rrf')
+
+
+def tokenize(text: str) -> list:
+    """Split text into the lowercase whitespace tokens used for lexical matching"""
+    return text.lower().split()
+
+
+def exact_form(text: str) -> str:
+    """Lowercase with whitespace collapsed"""
+    return ' '.join(text.lower().split())
+
+
+def normalized_form(text: str) -> str:
+    """exact_form without accents, tone marks and punctuation"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    kept = ''.join(
+        ' ' if unicodedata.category(char)[0] in 'PS' else char
+        for char in decomposed if not unicodedata.combining(char)
+    )
+    return ' '.join(kept.split())
+
+
+# Forms a term is looked up in, most exact first
+LOOKUP_FORMS = {'exact': exact_form, 'normalized': normalized_form}
+
+
+def term_trigrams(term: str) -> set:
+    """Character trigrams of a term padded with ^ and $, so short terms and word edges count"""
+    padded = f'^{term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance of a and b, or max_distance + 1 as soon as it is known to exceed it"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+def term_hash(text: str) -> int:
+    """Stable 64-bit hash of a lookup key (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def document_tokens(meta: dict) -> dict:
+    """Token sets of one document for every indexed field"""
+    phrase = set(tokenize(meta['phrase']))
+    translation = set(tokenize(meta['translation']))
+    return {
+        'phrase': phrase,
+        'translation': translation,
+        'text': phrase | translation,
+    }
+
+
+class Corpus:
+    """One corpus build: embeddings, metadata, per-language indexes and version
+
+    Never modified after construction. A reload builds a new Corpus and swaps
+    the reference, so anything holding the old one keeps a consistent view.
+    """
+
+    def __init__(self, embeddings=None, metadata: MetadataStore = None, model_info: dict = None,
+                 language_indexes: dict = None, version: str = None):
+        self.embeddings = embeddings
+        self.metadata = metadata if metadata is not None else MetadataStore.from_records([])
+        self.model_info = model_info or {}
+        self.language_indexes = language_indexes or {}
+        self.version = version
+
+        # Global document ids per language
+        self.language_indices = {language: index.ids for language, index in self.language_indexes.items()}
+
+    def __len__(self):
+        return len(self.metadata)
+
+
+class LanguageIndex:
+    """Pre-computed retrieval structures for the documents of one language"""
+
+    def __init__(self, language: str, ids, vectors, norms, vocab: list, doc_terms: dict, postings: dict,
+                 ivf: 'IVFIndex' = None, quantized: 'QuantizedVectors' = None, mean_vector=None,
+                 term_lookups: dict = None, trigrams: tuple = None):
+        self.language = language
+        self.ids = ids                # global document ids, ascending
+        self.vectors = vectors        # L2-normalised float32 rows, C-contiguous
+        self.norms = norms            # original row norms
+        self.vocab = vocab            # token list, the position is the term id
+        self.doc_terms = doc_terms    # field -> (indptr, term ids) per local document
+        self.postings = postings      # field -> (indptr, local documents) per term
+        self.ivf = ivf                # coarse clusters for approximate search, None = exact only
+        self.quantized = quantized    # compact copy of vectors for bulk scans, None = scan vectors
+        self.term_lookups = term_lookups  # form -> (sorted key hashes, entries), None = not built
+
+        self.term_ids = {token: term_id for term_id, token in enumerate(vocab)}
+        self.set_trigrams(trigrams)   # vocabulary trigrams for fuzzy matching, None = not built
+        self._mean_vector = mean_vector
+        self._doc_lengths = {}
+
+    def overlap_counts(self, query_words, field: str) -> tuple:
+        """Local documents sharing tokens with query_words in field, and how many they share
+
+        Only the posting lists of the query tokens are touched. Documents are
+        returned in ascending order.
+        """
+        indptr, docs = self.postings[field]
+        hits = [
+            docs[indptr[term_id]:indptr[term_id + 1]]
+            for term_id in (self.term_ids.get(word) for word in query_words)
+            if term_id is not None
+        ]
+        if not hits:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(hits), return_counts=True)
+
+    def match_term(self, term: str) -> tuple:
+        """(form, local documents, fields) whose phrase or translation equals term
+
+        Forms are tried in LOOKUP_FORMS order and the first with a hit wins.
+        fields index LOOKUP_FIELDS; documents come back in corpus order. Keys
+        are compared by 64-bit hash only, collisions are negligible at corpus
+        sizes. form is None when nothing matches.
+        """
+        for form, to_form in LOOKUP_FORMS.items():
+            key = to_form(term)
+            if not key or form not in (self.term_lookups or {}):
+                continue
+            hashes, entries = self.term_lookups[form]
+            key_hash = np.uint64(term_hash(key))
+            start, end = np.searchsorted(hashes, key_hash, 'left'), np.searchsorted(hashes, key_hash, 'right')
+            if end > start:
+                found = np.sort(entries[start:end])
+                return form, found // len(LOOKUP_FIELDS), found % len(LOOKUP_FIELDS)
+        return None, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    def bm25_scores(self, query_words, k1: float = 1.2, b: float = 0.75, field: str = 'text') -> tuple:
+        """Local documents sharing tokens with query_words in field, and their BM25 scores
+
+        Documents are token sets, so every term frequency is 1 and a document's
+        length is its number of distinct tokens. Documents come back ascending.
+        """
+        term_ids = np.array([t for t in (self.term_ids.get(word) for word in query_words) if t is not None],
+                            dtype=np.int64)
+        if not len(term_ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        indptr, docs = self.postings[field]
+        starts, ends = indptr[term_ids], indptr[term_ids + 1]
+        frequencies = ends - starts
+        idf = np.log1p((len(self.ids) - frequencies + 0.5) / (frequencies + 0.5))
+
+        matched, inverse = np.unique(
+            np.concatenate([docs[start:end] for start, end in zip(starts.tolist(), ends.tolist())]),
+            return_inverse=True
+        )
+        weights = np.bincount(inverse, weights=np.repeat(idf, frequencies))
+
+        lengths, mean_length = self.doc_lengths(field)
+        return matched, weights * (k1 + 1) / (1 + k1 * (1 - b + b * lengths[matched] / mean_length))
+
+    def doc_lengths(self, field: str) -> tuple:
+        """(distinct tokens per local document, their mean) in field, computed on first use and cached"""
+        if field not in self._doc_lengths:
+            lengths = np.diff(self.doc_terms[field][0])
+            self._doc_lengths[field] = (lengths, max(float(lengths.mean()), 1.0) if len(lengths) else 1.0)
+        return self._doc_lengths[field]
+
+    def pseudo_embeddings(self, queries_words: list) -> np.ndarray:
+        """Pseudo embeddings for several token sets as one sparse mat-mat product
+
+        Each row is the average of the original rows of the documents sharing
+        tokens with the query, weighted by overlap count. Rows are stored
+        normalised, so the weights are scaled by the row norms. Queries with no
+        overlap get the language mean.
+        """
+        matches = [self.overlap_counts(words, 'text') for words in queries_words]
+        docs = np.unique(np.concatenate([d for d, _ in matches] + [np.empty(0, dtype=np.int64)]))
+
+        weights = np.zeros((len(matches), len(docs)), dtype=np.float32)
+        for row, (matched, overlaps) in enumerate(matches):
+            weights[row, np.searchsorted(docs, matched)] = overlaps
+
+        totals = weights.sum(axis=1)
+        embeddings = (weights * self.norms[docs]) @ self.vectors[docs]
+
+        hit = totals > 0
+        embeddings[hit] /= totals[hit, None]
+        embeddings[~hit] = self.mean_vector()
+        return embeddings
+
+    def search(self, queries, k: int, nprobe: int = 0, shortlist: int = 0) -> list:
+        """(local documents, scores) of the k most similar rows per normalised query, best first
+
+        nprobe > 0 restricts the scan to the best IVF lists (when built). With
+        a quantised block, the scan runs over the compact codes and keeps
+        max(k, shortlist) candidates, which are re-scored exactly against the
+        float32 rows; only those rows are read.
+        """
+        if self.ivf is not None and nprobe > 0:
+            candidate_sets = self.ivf.probe(queries, nprobe)
+        else:
+            candidate_sets = [None] * len(queries)
+
+        results = []
+        if self.quantized is None:
+            for query, candidates in zip(queries, candidate_sets):
+                scores = (self.vectors if candidates is None else self.vectors[candidates]) @ query
+                best = top_k_indices(scores, k)
+                results.append((best if candidates is None else candidates[best], scores[best]))
+            return results
+
+        # All rows at once when there is no IVF, one GEMM per chunk for every query
+        scan = self.quantized.scores(queries) if self.ivf is None or nprobe <= 0 else None
+        for position, (query, candidates) in enumerate(zip(queries, candidate_sets)):
+            approximate = scan[position] if scan is not None else self.quantized.scores(query[None, :], candidates)[0]
+            short = top_k_indices(approximate, max(k, shortlist))
+            if candidates is not None:
+                short = candidates[short]
+            short = np.sort(short)  # Sequential reads of the float32 rows
+            exact = self.vectors[short] @ query
+            best = top_k_indices(exact, k)
+            results.append((short[best], exact[best]))
+        return results
+
+    def set_trigrams(self, trigrams: tuple):
+        """Attach a trigram index (build_trigram_index of the vocab) and its lookup table"""
+        self.trigrams = trigrams
+        self.trigram_ids = {gram: gram_id for gram_id, gram in enumerate(trigrams[0])} if trigrams else {}
+
+    def fuzzy_term(self, word: str, max_edits: int):
+        """Vocabulary term closest to word within max_edits edits, or None
+
+        Candidates are the terms sharing enough trigrams with word (one edit
+        changes at most three), the FUZZY_CANDIDATES with most shared trigrams
+        are compared by edit distance. Ties keep the candidate sharing more
+        trigrams.
+        """
+        grams = term_trigrams(word)
+        gram_ids = [self.trigram_ids[gram] for gram in grams if gram in self.trigram_ids]
+        if not gram_ids:
+            return None
+        _, indptr, terms = self.trigrams
+        candidates, shared = np.unique(
+            np.concatenate([terms[indptr[gram_id]:indptr[gram_id + 1]] for gram_id in gram_ids]),
+            return_counts=True
+        )
+        keep = shared >= len(grams) - 3 * max_edits
+        candidates, shared = candidates[keep], shared[keep]
+
+        best, best_distance = None, max_edits + 1
+        for term_id in candidates[np.argsort(-shared, kind='stable')[:FUZZY_CANDIDATES]].tolist():
+            distance = edit_distance(word, self.vocab[term_id], best_distance - 1)
+            if distance < best_distance:
+                best, best_distance = self.vocab[term_id], distance
+        return best
+
+    def correct_words(self, words: set, max_edits: int) -> set:
+        """words with out-of-vocabulary ones replaced by their closest term, where one is close enough
+
+        Surrounding punctuation is ignored. Words under 3 characters are kept
+        as they are, and words up to 5 characters allow a single edit.
+        """
+        if self.trigrams is None or max_edits <= 0:
+            return words
+        corrected = set()
+        for word in words:
+            key = word.strip(string.punctuation)
+            limit = 0 if len(key) < 3 else min(max_edits, 1 if len(key) <= 5 else max_edits)
+            if key in self.term_ids:
+                corrected.add(key)
+            else:
+                corrected.add((self.fuzzy_term(key, limit) if limit else None) or word)
+        return corrected
+
+    def mean_vector(self) -> np.ndarray:
+        """Average of all original rows, computed on first use and cached"""
+        if self._mean_vector is None:
+            self._mean_vector = (self.norms @ self.vectors) / np.float32(len(self.ids))
+        return self._mean_vector
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class IVFIndex:
+    """Inverted-file index over the normalised rows of one language
+
+    Rows are clustered around unit-length centroids (spherical k-means). A
+    query scores the centroids, then only the rows of its nprobe best lists:
+    more probes raise recall and cost, nprobe = number of lists is exact.
+    """
+
+    def __init__(self, centroids, indptr, members):
+        self.centroids = centroids    # (lists, dim) unit-length float32
+        self.indptr = indptr          # list boundaries into members
+        self.members = members        # local documents grouped by list, ascending inside a list
+
+    def probe(self, queries, nprobe: int) -> list:
+        """Local documents of the nprobe best lists for every normalised query"""
+        nprobe = min(nprobe, len(self.centroids))
+        coarse = queries @ self.centroids.T
+        return [
+            np.concatenate([self.members[self.indptr[l]:self.indptr[l + 1]] for l in top_k_indices(row, nprobe)])
+            for row in coarse
+        ]
+
+    def __len__(self):
+        return len(self.centroids)
+
+
+def build_ivf_index(vectors, num_lists: int = 0, seed: int = 0) -> IVFIndex:
+    """Cluster normalised rows into num_lists lists (0 = about 4 * sqrt(rows))"""
+    n = len(vectors)
+    num_lists = min(num_lists or int(4 * np.sqrt(n)), n)
+    rng = np.random.default_rng(seed)
+
+    # Train on a sample; sorted indices keep reads sequential on memory-mapped rows
+    sample_size = min(n, num_lists * IVF_TRAINING_ROWS_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(n, size=sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, size=num_lists, replace=False)].copy()
+
+    for _ in range(IVF_TRAINING_ITERATIONS):
+        assignment = _nearest_centroids(sample, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=num_lists)
+        filled = counts > 0
+
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        centroids[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+        # Empty lists restart from random sample rows
+        centroids[~filled] = sample[rng.choice(sample_size, size=int((~filled).sum()))]
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-8
+
+    assignment = _nearest_centroids(vectors, centroids)
+    indptr = np.zeros(num_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignment, minlength=num_lists), out=indptr[1:])
+    members = np.argsort(assignment, kind='stable').astype(np.int32)
+    return IVFIndex(centroids, indptr, members)
+
+
+class QuantizedVectors:
+    """Compact copy of normalised rows for bulk scans
+
+    float16 codes, or int8 codes with one float32 scale per row (the row
+    maximum maps to 127). Chunks are decoded to float32 for the matrix
+    product, so the scan streams 2 or 1 bytes per dimension instead of 4.
+    """
+
+    def __init__(self, codes, scales=None):
+        self.codes = codes            # (rows, dim) float16 or int8
+        self.scales = scales          # (rows,) float32 for int8 codes, else None
+
+    @property
+    def storage(self) -> str:
+        return 'int8' if self.scales is not None else 'float16'
+
+    def scores(self, queries, rows=None) -> np.ndarray:
+        """Approximate queries @ rows.T over all rows, or only the given ones"""
+        codes = self.codes if rows is None else self.codes[rows]
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_CHUNK_ROWS):
+            chunk = np.asarray(codes[start:start + SCAN_CHUNK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(chunk)] = queries @ chunk.T
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+
+def quantize_vectors(vectors, storage: str):
+    """QuantizedVectors for storage 'float16' or 'int8'; None for 'float32'"""
+    if storage not in SCAN_STORAGES:
+        raise ValueError(f"Unknown scan storage {storage!r} (expected one of {SCAN_STORAGES})")
+    if storage == 'float32':
+        return None
+    if storage == 'float16':
+        return QuantizedVectors(np.asarray(vectors, dtype=np.float16))
+
+    scales = (np.abs(vectors).max(axis=1) / 127).astype(np.float32) + np.float32(1e-12)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return QuantizedVectors(codes, scales)
+
+
+def search_recall(index: LanguageIndex, k: int, nprobe: int = 0, shortlist: int = 0,
+                  sample_size: int = 200, seed: int = 0) -> float:
+    """Share of the exact float32 top k that index.search returns
+
+    Queries are averages of a few random rows, the shape of the pseudo query
+    embeddings the service searches with.
+    """
+    vectors = index.vectors
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(vectors), size=(sample_size, 3))
+    queries = np.asarray(vectors[rows.ravel()]).reshape(sample_size, 3, -1).mean(axis=1)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-8
+
+    found = 0
+    for query, (approximate, _) in zip(queries, index.search(queries, k, nprobe, shortlist)):
+        exact = top_k_indices(np.asarray(vectors @ query), k)
+        found += len(np.intersect1d(exact, approximate))
+    return found / (len(queries) * min(k, len(vectors)))
+
+
+def _nearest_centroids(vectors, centroids):
+    """Index of the most similar centroid for every row, scored in chunks"""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), IVF_CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + IVF_CHUNK_ROWS])
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def top_k_indices(scores, k: int):
+    """Indices of the k highest scores, best first, without sorting everything"""
+    n = scores.shape[-1]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(scores, n - k)[n - k:]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def build_language_indexes(embeddings, metadata: list, ann_min_documents: int = 0, ann_lists: int = 0,
+                           scan_storage: str = 'float32') -> dict:
+    """Build a LanguageIndex for every language present in metadata (a MetadataStore or list of dicts)
+
+    Languages with at least ann_min_documents rows also get an IVF index with
+    ann_lists lists (0 = automatic); ann_min_documents = 0 builds none.
+    scan_storage 'float16' or 'int8' adds a compact block for the bulk scan.
+    """
+    grouped = {}
+    for i, meta in enumerate(metadata):
+        grouped.setdefault(meta['language'], []).append(i)
+
+    return {
+        language: build_language_index(
+            language, np.asarray(ids, dtype=np.int64), embeddings, metadata, ann_min_documents, ann_lists,
+            scan_storage
+        )
+        for language, ids in grouped.items()
+    }
+
+
+def build_language_index(language: str, ids, embeddings, metadata: list,
+                         ann_min_documents: int = 0, ann_lists: int = 0,
+                         scan_storage: str = 'float32') -> LanguageIndex:
+    """Build the normalised block, token sets, inverted index and optional IVF/scan blocks for one language"""
+    vectors = np.array(embeddings[ids], dtype=np.float32, order='C')
+    norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+    vectors /= (norms[:, None] + 1e-8)
+
+    term_ids = {}
+    rows = {field: [] for field in TOKEN_FIELDS}
+    for idx in ids:
+        tokens = document_tokens(metadata[idx])
+        for field in TOKEN_FIELDS:
+            rows[field].append(sorted(term_ids.setdefault(t, len(term_ids)) for t in tokens[field]))
+
+    vocab = [None] * len(term_ids)
+    for token, term_id in term_ids.items():
+        vocab[term_id] = token
+
+    doc_terms = {field: _pack_rows(rows[field]) for field in TOKEN_FIELDS}
+    postings = {
+        field: _transpose(indptr, terms, len(vocab))
+        for field, (indptr, terms) in doc_terms.items()
+    }
+    ivf = None
+    if ann_min_documents and len(ids) >= ann_min_documents:
+        ivf = build_ivf_index(vectors, ann_lists)
+    return LanguageIndex(
+        language, ids, vectors, norms, vocab, doc_terms, postings, ivf, quantize_vectors(vectors, scan_storage),
+        term_lookups=build_term_lookups(ids, metadata), trigrams=build_trigram_index(vocab)
+    )
+
+
+def build_trigram_index(vocab: list) -> tuple:
+    """(trigram list, indptr, term ids): the vocabulary terms containing each trigram, CSR"""
+    gram_ids = {}
+    rows = [sorted(gram_ids.setdefault(gram, len(gram_ids)) for gram in term_trigrams(term)) for term in vocab]
+    indptr, grams = _pack_rows(rows)
+    trigrams = [None] * len(gram_ids)
+    for gram, gram_id in gram_ids.items():
+        trigrams[gram_id] = gram
+    return (trigrams, *_transpose(indptr, grams, len(trigrams)))
+
+
+def build_term_lookups(ids, metadata) -> dict:
+    """Hashed exact-match tables of the documents ids, one per lookup form
+
+    Every (document, field) pair is keyed on the hash of its form; entries
+    encode local document * len(LOOKUP_FIELDS) + field, sorted by hash.
+    """
+    keys = {form: [] for form in LOOKUP_FORMS}
+    for local_id, idx in enumerate(ids):
+        meta = metadata[idx]
+        for field_id, field in enumerate(LOOKUP_FIELDS):
+            entry = local_id * len(LOOKUP_FIELDS) + field_id
+            for form, to_form in LOOKUP_FORMS.items():
+                keys[form].append((term_hash(to_form(meta[field])), entry))
+
+    lookups = {}
+    for form, pairs in keys.items():
+        hashes = np.array([key_hash for key_hash, _ in pairs], dtype=np.uint64)
+        entries = np.array([entry for _, entry in pairs], dtype=np.int64)
+        order = np.argsort(hashes, kind='stable')
+        lookups[form] = (hashes[order], entries[order])
+    return lookups
+
+
+def fuse_scores(semantic, lexical, method: str = 'weighted', semantic_weight: float = 0.5,
+                lexical_weight: float = 0.5, rrf_k: int = 60) -> np.ndarray:
+    """Fuse cosine and BM25 scores of the same candidates into one ranking score
+
+    'weighted' adds the cosine and the BM25 score scaled to the best candidate
+    (so both lie in comparable ranges); 'rrf' is reciprocal-rank fusion,
+    weight / (rrf_k + rank) per signal, where candidates without a lexical
+    match get no lexical share.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method {method!r} (expected one of {FUSION_METHODS})")
+    if method == 'weighted':
+        best = lexical.max() if len(lexical) else 0.0
+        return semantic_weight * semantic + lexical_weight * (lexical / best if best > 0 else lexical)
+
+    fused = np.zeros(len(semantic))
+    fused[np.argsort(-semantic, kind='stable')] += semantic_weight / (rrf_k + np.arange(1, len(semantic) + 1))
+    lexical_order = np.argsort(-lexical, kind='stable')
+    lexical_order = lexical_order[lexical[lexical_order] > 0]
+    fused[lexical_order] += lexical_weight / (rrf_k + np.arange(1, len(lexical_order) + 1))
+    return fused
+
+
+def _pack_rows(rows: list) -> tuple:
+    """Pack a list of int lists into CSR (indptr, indices) arrays"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+def _transpose(indptr, indices, num_columns: int) -> tuple:
+    """Transpose a CSR structure; rows stay ascending inside every column"""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind='stable')
+
+    t_indptr = np.zeros(num_columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=num_columns), out=t_indptr[1:])
+    return t_indptr, rows[order]
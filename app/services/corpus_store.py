@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import logging
+import numpy as np
+
+from app.services.corpus_index import IVFIndex, LanguageIndex, QuantizedVectors
+from app.services.metadata_store import MetadataStore
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = 'nerala-corpus'
+FORMAT_VERSION = 3
+SUPPORTED_FORMAT_VERSIONS = (1, 2, 3)
+
+MANIFEST_FILE = 'manifest.json'
+EMBEDDINGS_FILE = 'embeddings.npy'
+METADATA_FILE = 'metadata.json'
+METADATA_DIR = 'metadata'
+LANGUAGES_DIR = 'languages'
+
+
+def has_corpus(corpus_dir: str) -> bool:
+    """Check whether a binary corpus exists in corpus_dir"""
+    return bool(corpus_dir) and os.path.isfile(os.path.join(corpus_dir, MANIFEST_FILE))
+
+
+def write_corpus(corpus_dir: str, embeddings, metadata, model_info: dict = None,
+                 language_indexes: dict = None) -> dict:
+    """Write embeddings, metadata, per-language indexes and manifest in the binary corpus format
+
+    metadata is a MetadataStore or a list of metadata dicts.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    if not isinstance(metadata, MetadataStore):
+        metadata = MetadataStore.from_records(metadata)
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(metadata):
+        raise ValueError(
+            f"Embeddings shape {embeddings.shape} does not match {len(metadata)} metadata rows"
+        )
+
+    _save_array(os.path.join(corpus_dir, EMBEDDINGS_FILE), embeddings)
+
+    # Columnar layout: string buffers and code arrays are mapped at load, the JSON keeps the vocabularies
+    os.makedirs(os.path.join(corpus_dir, METADATA_DIR), exist_ok=True)
+    metadata_files = {}
+    for name, array in metadata.arrays().items():
+        metadata_files[name] = f"{METADATA_DIR}/{name}.npy"
+        _save_array(os.path.join(corpus_dir, metadata_files[name]), array)
+    _write_json_atomic(os.path.join(corpus_dir, METADATA_FILE), metadata.vocabularies, indent=None)
+
+    files = [EMBEDDINGS_FILE, METADATA_FILE, *metadata_files.values()]
+    languages = {}
+    for language, index in (language_indexes or {}).items():
+        language_files = _write_language_index(corpus_dir, index)
+        languages[language] = {
+            'documents': len(index),
+            'vocabulary': len(index.vocab),
+            'ivf_lists': len(index.ivf) if index.ivf is not None else 0,
+            'scan_storage': index.quantized.storage if index.quantized is not None else 'float32',
+            'files': language_files,
+        }
+        files.extend(language_files.values())
+
+    checksums = {name: file_checksum(os.path.join(corpus_dir, name)) for name in files}
+
+    manifest = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'corpus_version': _corpus_version(
+            checksums[EMBEDDINGS_FILE], checksums[METADATA_FILE],
+            *(checksums[name] for name in metadata_files.values())
+        ),
+        'num_documents': int(embeddings.shape[0]),
+        'dimension': int(embeddings.shape[1]),
+        'dtype': 'float32',
+        'files': {
+            'embeddings': EMBEDDINGS_FILE,
+            'metadata': METADATA_FILE,
+            'metadata_arrays': metadata_files,
+        },
+        'languages': languages,
+        'checksums': checksums,
+        'model_info': model_info or {},
+    }
+    # Manifest is written last so a partially written corpus is never picked up
+    _write_json_atomic(os.path.join(corpus_dir, MANIFEST_FILE), manifest)
+
+    logger.info(f"Corpus written to {corpus_dir}: {manifest['num_documents']} documents, "
+                f"version {manifest['corpus_version']}")
+    return manifest
+
+
+def read_manifest(corpus_dir: str) -> dict:
+    """Read and validate a corpus manifest"""
+    with open(os.path.join(corpus_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format') != FORMAT_NAME:
+        raise ValueError(f"Not a {FORMAT_NAME} directory: {corpus_dir}")
+    if manifest.get('format_version') not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(
+            f"Unsupported corpus format version {manifest.get('format_version')} "
+            f"(expected one of {SUPPORTED_FORMAT_VERSIONS})"
+        )
+    return manifest
+
+
+def load_corpus(corpus_dir: str, verify: bool = False):
+    """Load a binary corpus, memory-mapping every array
+
+    Returns (embeddings, metadata, model_info, language_indexes, manifest).
+    language_indexes is None for corpora written without per-language artifacts.
+    """
+    manifest = read_manifest(corpus_dir)
+    if verify:
+        verify_corpus(corpus_dir, manifest)
+    files = manifest['files']
+
+    embeddings = np.load(os.path.join(corpus_dir, files['embeddings']), mmap_mode='r')
+    expected_shape = (manifest['num_documents'], manifest['dimension'])
+    if embeddings.shape != expected_shape:
+        raise ValueError(f"Embeddings shape {embeddings.shape} does not match manifest {expected_shape}")
+
+    with open(os.path.join(corpus_dir, files['metadata']), 'r', encoding='utf-8') as f:
+        metadata_json = json.load(f)
+
+    if 'metadata_arrays' in files:
+        arrays = {
+            name: np.load(os.path.join(corpus_dir, path), mmap_mode='r')
+            for name, path in files['metadata_arrays'].items()
+        }
+        metadata = MetadataStore.from_arrays(arrays, metadata_json)
+    else:
+        # Format 1 and 2 kept every column in the JSON file
+        metadata = MetadataStore.from_columns(metadata_json)
+    if len(metadata) != manifest['num_documents']:
+        raise ValueError(f"Metadata has {len(metadata)} rows, manifest expects {manifest['num_documents']}")
+
+    language_indexes = None
+    if manifest.get('languages'):
+        language_indexes = {
+            language: _read_language_index(corpus_dir, language, entry['files'])
+            for language, entry in manifest['languages'].items()
+        }
+
+    return embeddings, metadata, manifest.get('model_info', {}), language_indexes, manifest
+
+
+def verify_corpus(corpus_dir: str, manifest: dict = None):
+    """Check every file listed in the manifest against its recorded checksum"""
+    manifest = manifest or read_manifest(corpus_dir)
+    for name, expected in manifest.get('checksums', {}).items():
+        actual = file_checksum(os.path.join(corpus_dir, name))
+        if actual != expected:
+            raise ValueError(f"Checksum mismatch for {name}: expected {expected}, got {actual}")
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_language_index(corpus_dir: str, index: LanguageIndex) -> dict:
+    """Write the arrays of one LanguageIndex; returns name -> relative path"""
+    if os.sep in index.language or index.language.startswith('.'):
+        raise ValueError(f"Invalid language name: {index.language!r}")
+
+    relative_dir = f"{LANGUAGES_DIR}/{index.language}"
+    os.makedirs(os.path.join(corpus_dir, relative_dir), exist_ok=True)
+
+    arrays = {
+        'ids': index.ids,
+        'vectors': index.vectors,
+        'norms': index.norms,
+        'mean': index.mean_vector(),
+    }
+    for field, (indptr, terms) in index.doc_terms.items():
+        arrays[f'{field}_terms_indptr'] = indptr
+        arrays[f'{field}_terms'] = terms
+    for field, (indptr, docs) in index.postings.items():
+        arrays[f'{field}_postings_indptr'] = indptr
+        arrays[f'{field}_postings'] = docs
+    if index.ivf is not None:
+        arrays['ivf_centroids'] = index.ivf.centroids
+        arrays['ivf_indptr'] = index.ivf.indptr
+        arrays['ivf_members'] = index.ivf.members
+    if index.quantized is not None:
+        arrays['scan_codes'] = index.quantized.codes
+        if index.quantized.scales is not None:
+            arrays['scan_scales'] = index.quantized.scales
+    for form, (hashes, entries) in (index.term_lookups or {}).items():
+        arrays[f'{form}_lookup_hashes'] = hashes
+        arrays[f'{form}_lookup_entries'] = entries
+    if index.trigrams is not None:
+        arrays['trigram_indptr'] = index.trigrams[1]
+        arrays['trigram_terms'] = index.trigrams[2]
+
+    files = {}
+    for name, array in arrays.items():
+        files[name] = f"{relative_dir}/{name}.npy"
+        _save_array(os.path.join(corpus_dir, files[name]), array)
+
+    files['vocab'] = f"{relative_dir}/vocab.json"
+    _write_json_atomic(os.path.join(corpus_dir, files['vocab']), index.vocab, indent=None)
+    if index.trigrams is not None:
+        files['trigrams'] = f"{relative_dir}/trigrams.json"
+        _write_json_atomic(os.path.join(corpus_dir, files['trigrams']), index.trigrams[0], indent=None)
+    return files
+
+
+def _read_language_index(corpus_dir: str, language: str, files: dict) -> LanguageIndex:
+    """Map the arrays of one language back into a LanguageIndex"""
+    def array(name):
+        return np.load(os.path.join(corpus_dir, files[name]), mmap_mode='r')
+
+    with open(os.path.join(corpus_dir, files['vocab']), 'r', encoding='utf-8') as f:
+        vocab = json.load(f)
+
+    doc_terms = {}
+    postings = {}
+    term_lookups = {}
+    for name in files:
+        if name.endswith('_terms_indptr'):
+            field = name[:-len('_terms_indptr')]
+            doc_terms[field] = (array(f'{field}_terms_indptr'), array(f'{field}_terms'))
+            postings[field] = (array(f'{field}_postings_indptr'), array(f'{field}_postings'))
+        elif name.endswith('_lookup_hashes'):
+            form = name[:-len('_lookup_hashes')]
+            term_lookups[form] = (array(f'{form}_lookup_hashes'), array(f'{form}_lookup_entries'))
+
+    ivf = None
+    if 'ivf_centroids' in files:
+        ivf = IVFIndex(array('ivf_centroids'), array('ivf_indptr'), array('ivf_members'))
+
+    quantized = None
+    if 'scan_codes' in files:
+        quantized = QuantizedVectors(array('scan_codes'), array('scan_scales') if 'scan_scales' in files else None)
+
+    trigrams = None
+    if 'trigrams' in files:
+        with open(os.path.join(corpus_dir, files['trigrams']), 'r', encoding='utf-8') as f:
+            trigrams = (json.load(f), array('trigram_indptr'), array('trigram_terms'))
+
+    # Stored mean: the float32 rows need not be read in full at startup
+    mean_vector = np.asarray(array('mean')) if 'mean' in files else None
+
+    return LanguageIndex(
+        language, array('ids'), array('vectors'), array('norms'), vocab, doc_terms, postings, ivf,
+        quantized, mean_vector, term_lookups or None, trigrams
+    )
+
+
+def _corpus_version(*checksums) -> str:
+    """Short content hash identifying a corpus build"""
+    return hashlib.sha256(''.join(checksums).encode('ascii')).hexdigest()[:12]
+
+
+def _save_array(path: str, array):
+    """Save an array through a temporary file so live memory maps keep the old inode"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _write_json_atomic(path: str, payload, indent: int = 2):
+    """Write JSON through a temporary file and rename it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=indent,
+                  separators=(',', ':') if indent is None else None)
+    os.replace(tmp_path, path)
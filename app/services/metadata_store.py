@@ -0,0 +1,122 @@
+import numpy as np
+
+# Text columns stored as UTF-8 buffers; the *_lower ones are pre-lowered copies for matching
+TEXT_COLUMNS = ('phrase', 'translation', 'phrase_lower', 'translation_lower')
+CODE_COLUMNS = ('category', 'language')
+
+DEFAULT_CATEGORY = 'general'
+
+
+class MetadataStore:
+    """Columnar, read-only document metadata
+
+    Phrases and translations live in contiguous UTF-8 buffers addressed by
+    offsets, next to pre-lowered copies; categories and languages are interned
+    into small integer codes. All columns are plain arrays, so a stored corpus
+    maps them instead of building one dict per document.
+
+    Indexing returns the familiar {phrase, translation, category, language}
+    dict, built on demand; hot paths use the column accessors instead.
+    """
+
+    def __init__(self, texts: dict, codes: dict, vocabularies: dict):
+        self.texts = texts                  # column -> (uint8 data, int64 offsets)
+        self.codes = codes                  # 'category' / 'language' -> code per document
+        self.vocabularies = vocabularies    # 'category' / 'language' -> names, the position is the code
+
+    @classmethod
+    def from_records(cls, records: list) -> 'MetadataStore':
+        """Build from a list of metadata dicts (the rag_data.json shape)"""
+        return cls.from_columns({
+            'phrase': [meta['phrase'] for meta in records],
+            'translation': [meta['translation'] for meta in records],
+            'category': [meta.get('category', DEFAULT_CATEGORY) for meta in records],
+            'language': [meta['language'] for meta in records],
+        })
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> 'MetadataStore':
+        """Build from one list per field"""
+        texts = {
+            'phrase': _pack_strings(columns['phrase']),
+            'translation': _pack_strings(columns['translation']),
+            'phrase_lower': _pack_strings(value.lower() for value in columns['phrase']),
+            'translation_lower': _pack_strings(value.lower() for value in columns['translation']),
+        }
+        codes = {}
+        vocabularies = {}
+        for column in CODE_COLUMNS:
+            codes[column], vocabularies[column] = _intern(columns[column])
+        return cls(texts, codes, vocabularies)
+
+    def text(self, column: str, i: int) -> str:
+        """Value of a text column for document i"""
+        data, offsets = self.texts[column]
+        return data[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+    def phrase(self, i: int) -> str:
+        return self.text('phrase', i)
+
+    def translation(self, i: int) -> str:
+        return self.text('translation', i)
+
+    def category(self, i: int) -> str:
+        return self.vocabularies['category'][self.codes['category'][i]]
+
+    def language(self, i: int) -> str:
+        return self.vocabularies['language'][self.codes['language'][i]]
+
+    def languages(self) -> list:
+        """Languages with at least one document"""
+        present = np.unique(np.asarray(self.codes['language']))
+        return [self.vocabularies['language'][code] for code in present]
+
+    def arrays(self) -> dict:
+        """Every column as name -> array, for writing to disk"""
+        arrays = {}
+        for column, (data, offsets) in self.texts.items():
+            arrays[f'{column}_data'] = data
+            arrays[f'{column}_offsets'] = offsets
+        for column, codes in self.codes.items():
+            arrays[f'{column}_codes'] = codes
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, vocabularies: dict) -> 'MetadataStore':
+        """Inverse of arrays(), e.g. over memory-mapped files"""
+        # Plain ndarray views of the maps: slicing np.memmap per access is several times slower
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        texts = {column: (arrays[f'{column}_data'], arrays[f'{column}_offsets']) for column in TEXT_COLUMNS}
+        codes = {column: arrays[f'{column}_codes'] for column in CODE_COLUMNS}
+        return cls(texts, codes, vocabularies)
+
+    def __getitem__(self, i) -> dict:
+        return {
+            'phrase': self.phrase(i),
+            'translation': self.translation(i),
+            'category': self.category(i),
+            'language': self.language(i),
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __len__(self):
+        return len(self.codes['language'])
+
+
+def _pack_strings(values) -> tuple:
+    """UTF-8 encode strings into one buffer plus len + 1 offsets"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _intern(values: list) -> tuple:
+    """(codes, names) with names in first-seen order, codes in the smallest fitting dtype"""
+    positions = {}
+    codes = [positions.setdefault(value, len(positions)) for value in values]
+    dtype = np.uint8 if len(positions) <= 1 << 8 else np.uint16 if len(positions) <= 1 << 16 else np.int32
+    return np.asarray(codes, dtype=dtype), list(positions)
@@ -0,0 +1,193 @@
+"""In-process metrics rendered in the Prometheus text exposition format
+
+Counters and histograms are plain dicts of per-label-set values guarded by a
+lock, so recording costs a few microseconds and can stay on in production.
+Gauges are callbacks evaluated at scrape time. Values are per process: under
+gunicorn each worker reports its own.
+"""
+import bisect
+import math
+import os
+import resource
+import threading
+import time
+
+# Seconds; spans a cache hit (sub-millisecond) to a slow model call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+
+    def time(self, *labels) -> '_Timer':
+        """Context manager observing the duration of its block, also when it raises"""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            label_dict = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), values):
+                cumulative += count
+                yield self.name + '_bucket', {**label_dict, 'le': _format_value(bound)}, cumulative
+            yield self.name + '_count', label_dict, cumulative
+            yield self.name + '_sum', label_dict, values[-1]
+
+
+class _Timer:
+    # A plain class is cheaper per block than a contextlib generator
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Gauge:
+    """Value read from a callback at scrape time
+
+    The callback returns a number, or a list of (labels dict, number) pairs.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def samples(self):
+        value = self.callback()
+        if isinstance(value, (list, tuple)):
+            for labels, sample in value:
+                yield self.name, labels, sample
+        elif value is not None:
+            yield self.name, {}, value
+
+
+class MetricsRegistry:
+    """Named metrics of this process, rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback) -> Gauge:
+        """Register a callback gauge, replacing any earlier one of the same name"""
+        gauge = Gauge(name, documentation, callback)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def _register(self, metric):
+        # Counters and histograms keep their first registration, so a re-import shares the values
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # A failing gauge callback must not break the whole scrape
+                lines.append(f'# {metric.name} unavailable: {e}')
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def resident_memory_bytes() -> int:
+    """Current resident set size; peak RSS where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+registry = MetricsRegistry()
+registry.gauge('process_resident_memory_bytes', 'Resident memory size in bytes', resident_memory_bytes)
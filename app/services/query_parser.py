@@ -0,0 +1,96 @@
+import functools
+import re
+from typing import NamedTuple
+
+from config.settings import Config
+
+# Extraction rules in rank order, after quoted strings: (trigger, pattern). A
+# pattern is only run when its trigger occurs in the query, and names the
+# wanted text 'term'.
+_RULES = (
+    # How to say/translate patterns
+    ('say', r"how (?:do|to) (?:you )?say [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+    ('translate', r"how (?:do|to) (?:you )?translate [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+    ('what', r"what (?:is|does) [\"']?(?P<term>.+?)[\"']? (?:mean|in)"),
+    ('translate', r"translate [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+    ('say', r"say [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+
+    # Direct word queries
+    ('what', r"what is [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+    ('meaning of', r"meaning of [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+    ('define', r"define [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+
+    # Word in language patterns
+    ('{language}', r"[\"']?(?P<term>.+?)[\"']? in (?P<target>{languages})"),
+    ('{language}', r"(?P<target>{languages}) (?:word )?for [\"']?(?P<term>.+?)[\"']?(?:\?|$)"),
+)
+
+# Quoted words, taken from the original query so their case is kept
+_QUOTED = re.compile(r'["\']([^"\']+)["\']')
+
+
+class ParsedQuery(NamedTuple):
+    """What a query asks for: ranked candidate terms and the languages it names"""
+    terms: tuple                  # best first, unique ignoring case
+    target_language: str = None   # "... in fulfulde", "... into french", "fulfulde word for ..."
+    source_language: str = None   # "... from english"
+
+
+class QueryParser:
+    """Precompiled extraction of translation terms
+
+    One scan over the lowercased query finds which rule triggers it contains
+    ("say", "what", a language name, ...); only the rules of those triggers
+    run, in rank order. Quoted strings are the most explicit and rank first.
+    Results are memoised per query text.
+    """
+
+    def __init__(self, languages: list, memo_size: int = 4096):
+        names = '|'.join(re.escape(language) for language in languages)
+        self.rules = []
+        for trigger, pattern in _RULES:
+            triggers = list(languages) if trigger == '{language}' else [trigger]
+            self.rules.append((frozenset(triggers), re.compile(pattern.format(languages=names), re.IGNORECASE)))
+
+        all_triggers = sorted({t for triggers, _ in self.rules for t in triggers}, key=len, reverse=True)
+        self.trigger_pattern = re.compile('|'.join(re.escape(t) for t in all_triggers))
+        self.target_pattern = re.compile(rf"\b(?:in|into|to) (?P<target>{names})\b", re.IGNORECASE)
+        self.source_pattern = re.compile(rf"\bfrom (?P<source>{names})\b", re.IGNORECASE)
+
+        # Memo of immutable results, shared by every thread
+        self.parse = functools.lru_cache(maxsize=memo_size)(self._parse)
+
+    def _parse(self, query: str) -> ParsedQuery:
+        query_lower = query.lower().strip()
+        present = set(self.trigger_pattern.findall(query_lower))
+
+        terms = []
+        if '"' in query or "'" in query:
+            terms.extend(match.strip() for match in _QUOTED.findall(query) if len(match.strip()) > 1)
+
+        target_language = None
+        for triggers, pattern in self.rules:
+            if present.isdisjoint(triggers):
+                continue
+            for match in pattern.finditer(query_lower):
+                # Clean up the term
+                term = match.group('term').strip().strip('"\'').strip('?.,!').strip()
+                if len(term) > 1:  # Avoid single characters
+                    terms.append(term)
+                if target_language is None and 'target' in pattern.groupindex:
+                    target_language = match.group('target')
+
+        if target_language is None:
+            target = self.target_pattern.search(query_lower)
+            target_language = target.group('target') if target else None
+        source = self.source_pattern.search(query_lower)
+
+        # Remove duplicates while preserving rank
+        unique_terms = {}
+        for term in terms:
+            unique_terms.setdefault(term.lower(), term)
+        return ParsedQuery(tuple(unique_terms.values()), target_language, source.group('source') if source else None)
+
+
+# Built once per process, shared by every RAGService
+query_parser = QueryParser(Config.SUPPORTED_LANGUAGES, Config.QUERY_MEMO_SIZE)
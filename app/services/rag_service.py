@@ -1,3 +1,8 @@
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import os
 import json
 import numpy as np
 import google.generativeai as genai
@@ -5,162 +10,981 @@ from config.settings import Config
 import logging
 from huggingface_hub import hf_hub_download
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from app.services.corpus_index import (
+    LOOKUP_FIELDS, Corpus, build_language_indexes, build_term_lookups, build_trigram_index, fuse_scores,
+    tokenize, top_k_indices
+)
+from app.services.corpus_store import MANIFEST_FILE, has_corpus, load_corpus
+from app.services.metadata_store import MetadataStore
+from app.services.metrics import registry
+from app.services.query_parser import query_parser
+from app.services.response_cache import ResponseCache, make_cache_key
+from app.services.semantic_cache import SemanticCache, make_semantic_key
+from app.services.admission import AdmissionRejected, GenerationGate, Overloaded
+from app.services.async_model import AsyncModelClient
+from app.services.single_flight import AsyncSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Stand-in query used to fingerprint a prompt independently of the query wording
+QUERY_PLACEHOLDER = '{query}'
+
+class CacheKeys(NamedTuple):
+    """Keys of one generation in the response cache and the semantic cache"""
+    response: Optional[str]
+    scope: Optional[tuple]
+    semantic: Optional[tuple]
+    embedding: Optional[np.ndarray]
+
+# Per-stage latency; stages: completion, extract_terms, direct_answer, retrieval, text_fallback,
+# prompt, cache_lookup, generate, generate_stream (until the last chunk), fallback
+STAGE_SECONDS = registry.histogram(
+    'rag_stage_duration_seconds', 'Time spent in each stage of a completion', ('stage', 'language')
+)
+FALLBACK_COMPLETIONS = registry.counter(
+    'rag_fallback_completions_total', 'Completions answered by the context-free fallback', ('language',)
+)
+EMPTY_CONTEXT = registry.counter(
+    'rag_empty_context_total', 'Retrievals that found no context for the query', ('language',)
+)
+
+# (service, corpus) pinned for the request running in the current thread or task
+_PINNED_CORPUS = contextvars.ContextVar('pinned_corpus', default=None)
+
+# Direct answers, by the field the term matched: the other field is the answer
+DIRECT_ANSWER_TEMPLATES = {
+    'translation': '"{term}" in {language}: {answers}',
+    'phrase': '"{term}" ({language}) means: {answers}',
+}
+
+# Trailing target language in an extracted term ("water in fulfulde")
+_LANGUAGE_SUFFIX = re.compile(r'\s+(?:in|into|to)\s+(?:' + '|'.join(Config.SUPPORTED_LANGUAGES) + r')$', re.IGNORECASE)
+
+# Question words a query may have around the terms and still get a direct answer
+DIRECT_ANSWER_FILLER_WORDS = frozenset([
+    'how', 'do', 'does', 'you', 'i', 'to', 'say', 'translate', 'what', 'is', 'the', 'a', 'word', 'for',
+    'mean', 'means', 'meaning', 'of', 'define', 'in', 'into', 'please', *Config.SUPPORTED_LANGUAGES
+])
+
+class ServiceNotReady(Exception):
+    """Raised when the corpus is still loading after the readiness timeout"""
+
 class RAGService:
-    def __init__(self):
+    def __init__(self, background: bool = True):
         genai.configure(api_key=Config.GEMINI_API_KEY)
         self.model = genai.GenerativeModel(model_name=Config.GEMINI_MODEL)
         
-        # Load pre-computed RAG data
-        self._load_rag_data()
-
-        # Common query patterns for word/phrase translation requests
-        self.translation_patterns = [
-            # How to say/translate patterns
-            r"how (?:do|to) (?:you )?say [\"']?(.+?)[\"']?(?:\?|$)",
-            r"how (?:do|to) (?:you )?translate [\"']?(.+?)[\"']?(?:\?|$)",
-            r"what (?:is|does) [\"']?(.+?)[\"']? (?:mean|in)",
-            r"translate [\"']?(.+?)[\"']?(?:\?|$)",
-            r"say [\"']?(.+?)[\"']?(?:\?|$)",
-            
-            # Direct word queries
-            r"what is [\"']?(.+?)[\"']?(?:\?|$)",
-            r"meaning of [\"']?(.+?)[\"']?(?:\?|$)",
-            r"define [\"']?(.+?)[\"']?(?:\?|$)",
-            
-            # Word in language patterns
-            r"[\"']?(.+?)[\"']? in " + r"(fulfulde|ghomala|english|french)",
-            r"(fulfulde|ghomala|english|french) (?:word )?for [\"']?(.+?)[\"']?(?:\?|$)",
-        ]
+        # Empty corpus until loading finishes; replaced as a whole on reload
+        self._corpus = Corpus()
+        
+        # Loading progress, reported by readiness()
+        self._loaded = threading.Event()
+        self.load_state = {'status': 'pending', 'stage': None, 'started_at': None, 'finished_at': None, 'error': None}
+        
+        # Hot reload progress; the current corpus keeps serving meanwhile
+        self._reload_lock = threading.Lock()
+        self.reload_state = {'status': 'idle', 'stage': None, 'started_at': None, 'finished_at': None, 'error': None}
+        self._manifest_mtime = None
+        self._watch_pid = None
+        
+        # Bounded pool for batch generation calls
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.BATCH_MAX_CONCURRENCY, thread_name_prefix='rag-batch'
+        )
+        
+        # Concurrent identical prompts share one upstream generation
+        self.single_flight = SingleFlight()
+        
+        # Threaded serving path: generations beyond the cap and its wait queue are shed
+        self.generation_gate = GenerationGate(
+            max_concurrent=Config.MAX_CONCURRENT_GENERATIONS,
+            max_waiting=Config.GENERATION_QUEUE_SIZE,
+            wait_timeout=Config.GENERATION_QUEUE_TIMEOUT,
+            retry_after=Config.OVERLOAD_RETRY_AFTER
+        )
+        
+        # Async serving path: bounded upstream concurrency without a thread per request
+        self.async_client = AsyncModelClient(
+            Config.ASYNC_MAX_CONCURRENT_GENERATIONS,
+            max_waiting=Config.ASYNC_GENERATION_QUEUE_SIZE,
+            wait_timeout=Config.GENERATION_QUEUE_TIMEOUT,
+            retry_after=Config.OVERLOAD_RETRY_AFTER
+        )
+        self.async_single_flight = AsyncSingleFlight()
+        
+        # Generated responses, keyed on normalised query + context + prompt template
+        self.response_cache = None
+        if Config.RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                max_entries=Config.RESPONSE_CACHE_SIZE,
+                ttl_seconds=Config.RESPONSE_CACHE_TTL,
+                sqlite_path=Config.RESPONSE_CACHE_DB
+            )
+        
+        # Generated responses shared by differently worded questions with the same terms and sources
+        self.semantic_cache = None
+        if Config.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                max_entries=Config.SEMANTIC_CACHE_SIZE,
+                ttl_seconds=Config.RESPONSE_CACHE_TTL,
+                similarity_threshold=Config.SEMANTIC_CACHE_SIMILARITY,
+                recent_embeddings=Config.SEMANTIC_CACHE_RECENT
+            )
+        
+        self._register_gauges()
+        
+        # Load pre-computed RAG data without blocking app creation
+        if background:
+            self.start_loading()
+            self.start_watching()
+        else:
+            self._load_rag_data()
+    
+    def _register_gauges(self):
+        """Corpus and generation gauges for /metrics, read at scrape time"""
+        registry.gauge('rag_corpus_ready', 'Whether the corpus has finished loading', lambda: int(self.is_ready()))
+        registry.gauge(
+            'rag_corpus_info', 'Version of the corpus being served',
+            lambda: [({'version': self._corpus.version or ''}, 1)]
+        )
+        registry.gauge(
+            'rag_corpus_documents', 'Documents per language in the corpus being served',
+            lambda: [({'language': language}, len(ids)) for language, ids in self._corpus.language_indices.items()]
+        )
+        registry.gauge(
+            'rag_corpus_embedding_bytes', 'Size of the corpus embedding matrix (memory-mapped when built offline)',
+            lambda: self._corpus.embeddings.nbytes if self._corpus.embeddings is not None else 0
+        )
+        registry.gauge(
+            'rag_generations_in_flight', 'Model calls in progress',
+            lambda: [({'mode': 'threaded'}, self.generation_gate.in_flight), ({'mode': 'async'}, self.async_client.in_flight)]
+        )
+        registry.gauge(
+            'rag_generations_waiting', 'Model calls waiting for a slot',
+            lambda: [({'mode': 'threaded'}, self.generation_gate.waiting), ({'mode': 'async'}, self.async_client.waiting)]
+        )
+    
+    @property
+    def corpus(self) -> Corpus:
+        """Corpus pinned for the current request, or the live one outside a request"""
+        pinned = _PINNED_CORPUS.get()
+        if pinned is not None and pinned[0] is self:
+            return pinned[1]
+        return self._corpus
+    
+    @contextlib.contextmanager
+    def pinned_corpus(self, corpus: Corpus = None):
+        """Serve everything inside the block from one corpus, even if a reload swaps it meanwhile"""
+        token = _PINNED_CORPUS.set((self, corpus or self._corpus))
+        try:
+            yield
+        finally:
+            _PINNED_CORPUS.reset(token)
+    
+    @property
+    def embeddings(self):
+        return self.corpus.embeddings
+    
+    @property
+    def metadata(self) -> MetadataStore:
+        return self.corpus.metadata
+    
+    @property
+    def model_info(self) -> dict:
+        return self.corpus.model_info
+    
+    @property
+    def language_indexes(self) -> dict:
+        return self.corpus.language_indexes
+    
+    @property
+    def language_indices(self) -> dict:
+        return self.corpus.language_indices
+    
+    @property
+    def corpus_version(self):
+        return self.corpus.version
+    
+    def start_loading(self):
+        """Load the corpus on a background thread; requests wait via ensure_ready()"""
+        thread = threading.Thread(target=self._load_rag_data, name='rag-corpus-loader', daemon=True)
+        thread.start()
+        return thread
+    
+    def is_ready(self) -> bool:
+        """True once the corpus has been loaded successfully"""
+        return self._loaded.is_set() and self.load_state['status'] == 'ready'
+    
+    def ensure_ready(self, timeout: float = None):
+        """Wait for the corpus load to finish, raising ServiceNotReady on timeout
         
+        A failed load does not raise: completions then run without context, as
+        they always have.
+        """
+        if not self._loaded.wait(Config.CORPUS_READY_TIMEOUT if timeout is None else timeout):
+            raise ServiceNotReady(f"Corpus still loading ({self.load_state['stage']})")
+    
+    async def ensure_ready_async(self, timeout: float = None):
+        """Async variant of ensure_ready; polls so waiters do not hold executor threads"""
+        deadline = time.monotonic() + (Config.CORPUS_READY_TIMEOUT if timeout is None else timeout)
+        while not self._loaded.is_set():
+            if time.monotonic() >= deadline:
+                raise ServiceNotReady(f"Corpus still loading ({self.load_state['stage']})")
+            await asyncio.sleep(0.05)
+    
+    def readiness(self) -> dict:
+        """Load progress and corpus version for the /ready endpoint"""
+        corpus = self._corpus
+        return {
+            'ready': self.is_ready(),
+            **self._progress(self.load_state),
+            'corpus_version': corpus.version,
+            'documents': len(corpus),
+            'languages': list(corpus.language_indices.keys()),
+            'reload': self._progress(self.reload_state)
+        }
+    
+    @staticmethod
+    def _progress(state: dict) -> dict:
+        """Copy of a load state with the timestamps turned into elapsed seconds"""
+        state = dict(state)
+        started_at = state.pop('started_at')
+        finished_at = state.pop('finished_at')
+        elapsed = None
+        if started_at is not None:
+            elapsed = round((finished_at or time.time()) - started_at, 3)
+        state['elapsed_seconds'] = elapsed
+        return state
+    
+    def _set_load_stage(self, state: dict, stage: str):
+        state['stage'] = stage
+        logger.info(f"Corpus load: {stage}")
+    
     def _load_rag_data(self):
-        """Load pre-computed embeddings and metadata from JSON"""
+        """Load pre-computed embeddings and metadata (binary corpus first, JSON fallback)"""
+        self.load_state.update(status='loading', stage=None, started_at=time.time(), finished_at=None, error=None)
         try:
-            # Download from Hugging Face
-            data_path = hf_hub_download(
-                repo_id="nde-dilan/nerala-rag-model", 
-                filename="rag_data.json"
-            )
-            
-            with open(data_path, 'r', encoding='utf-8') as f:
-                rag_data = json.load(f)
+            corpus = self._build_corpus(self.load_state)
             
-            # Load embeddings AND metadata
-            self.embeddings = np.array(rag_data['embeddings'])
-            self.metadata = rag_data['metadata']
-            self.model_info = rag_data['model_info']
+            # Publish everything only once it is complete
+            self._corpus = corpus
             
-            # Create language-specific indices for faster lookup
-            self.language_indices = {}
-            for i, meta in enumerate(self.metadata):
-                lang = meta['language']
-                if lang not in self.language_indices:
-                    self.language_indices[lang] = []
-                self.language_indices[lang].append(i)
-            
-            logger.info(f"RAG data loaded: {len(self.metadata)} documents")
-            logger.info(f"Languages: {list(self.language_indices.keys())}")
+            self.load_state['status'] = 'ready'
+            logger.info(f"RAG data loaded: {len(corpus)} documents, version {corpus.version}")
+            logger.info(f"Languages: {list(corpus.language_indices.keys())}")
             
         except Exception as e:
             logger.error(f"Failed to load RAG data: {e}")
-            self.embeddings = None
-            self.metadata = []
-            self.model_info = {}
-            self.language_indices = {}
+            self.load_state.update(status='failed', error=str(e))
+        finally:
+            self.load_state['finished_at'] = time.time()
+            self._loaded.set()
+    
+    def reload_corpus(self) -> bool:
+        """Rebuild the corpus on a background thread and swap it in when complete
+        
+        Requests keep being served from the current corpus during the rebuild,
+        and those already running finish on it. Returns False when a reload is
+        already in progress.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        
+        self.reload_state.update(status='loading', stage=None, started_at=time.time(), finished_at=None, error=None)
+        thread = threading.Thread(target=self._reload_corpus, name='rag-corpus-reloader', daemon=True)
+        thread.start()
+        return True
     
-    def get_completion(self, query: str, language: str, top_k: int = 3) -> dict:
-        """Get RAG-enhanced completion with smart query preprocessing"""
+    def _reload_corpus(self):
         try:
-            # Extract the actual word/phrase the user wants to translate
-            extracted_terms = self._extract_translation_terms(query)
+            previous = self._corpus.version
+            corpus = self._build_corpus(self.reload_state)
             
-            # Try finding context with extracted terms first
-            context = []
-            for term in extracted_terms:
-                term_context = self._get_relevant_context_semantic(term, language, top_k)
-                if not term_context:
-                    term_context = self._get_relevant_context_text(term, language, top_k)
-                context.extend(term_context)
+            # A single reference assignment: every request sees the old or the new corpus
+            self._corpus = corpus
+            
+            self.reload_state['status'] = 'ready'
+            logger.info(f"Corpus reloaded: version {previous} -> {corpus.version}, {len(corpus)} documents")
+        except Exception as e:
+            logger.error(f"Corpus reload failed, keeping version {self._corpus.version}: {e}")
+            self.reload_state.update(status='failed', error=str(e))
+        finally:
+            self.reload_state['finished_at'] = time.time()
+            self._reload_lock.release()
+    
+    def start_watching(self):
+        """Poll the corpus manifest and reload when it changes (CORPUS_WATCH_INTERVAL > 0)
+        
+        Threads do not survive fork(), so preforked workers call this after
+        forking (see gunicorn.conf.py); calling it twice in a process is a no-op.
+        """
+        if Config.CORPUS_WATCH_INTERVAL <= 0 or self._watch_pid == os.getpid():
+            return None
+        self._watch_pid = os.getpid()
+        thread = threading.Thread(target=self._watch_corpus, name='rag-corpus-watcher', daemon=True)
+        thread.start()
+        return thread
+    
+    def _watch_corpus(self):
+        manifest_path = os.path.join(Config.CORPUS_DIR, MANIFEST_FILE)
+        attempted = None
+        while True:
+            time.sleep(Config.CORPUS_WATCH_INTERVAL)
+            try:
+                mtime = os.stat(manifest_path).st_mtime_ns
+            except OSError:
+                continue
+            # The manifest is written last by build_index, so a new one means a complete
+            # corpus; each new manifest is tried once, even if loading it fails
+            if mtime != self._manifest_mtime and mtime != attempted and self._loaded.is_set():
+                logger.info(f"Corpus manifest changed in {Config.CORPUS_DIR}, reloading")
+                if self.reload_corpus():
+                    attempted = mtime
+    
+    def _build_corpus(self, state: dict) -> Corpus:
+        """Load a complete Corpus (binary corpus first, JSON fallback), warmed and ready to publish"""
+        language_indexes = None
+        manifest_mtime = None
+        if has_corpus(Config.CORPUS_DIR):
+            # Memory-mapped arrays, no JSON parsing of the vectors
+            self._set_load_stage(state, 'mapping')
+            manifest_mtime = os.stat(os.path.join(Config.CORPUS_DIR, MANIFEST_FILE)).st_mtime_ns
+            embeddings, metadata, model_info, language_indexes, manifest = load_corpus(
+                Config.CORPUS_DIR, verify=Config.CORPUS_VERIFY_CHECKSUMS
+            )
+            corpus_version = manifest.get('corpus_version')
+            logger.info(f"Binary corpus loaded from {Config.CORPUS_DIR} (format v{manifest['format_version']})")
+        else:
+            embeddings, metadata, model_info, corpus_version = self._load_rag_json(state)
+        
+        # Corpora without pre-built artifacts get their indexes built once here
+        if language_indexes is None:
+            self._set_load_stage(state, 'indexing')
+            language_indexes = build_language_indexes(
+                embeddings, metadata, Config.ANN_MIN_DOCUMENTS, Config.ANN_LISTS, Config.EMBEDDING_STORAGE
+            )
+        
+        # Corpora built before the exact-match tables or trigram index get them here when in use
+        for index in language_indexes.values():
+            if Config.DIRECT_ANSWER_ENABLED and index.term_lookups is None:
+                index.term_lookups = build_term_lookups(index.ids, metadata)
+            if Config.FUZZY_MAX_EDITS > 0 and index.trigrams is None:
+                index.set_trigrams(build_trigram_index(index.vocab))
+        
+        corpus = Corpus(embeddings, metadata, model_info, language_indexes, corpus_version)
+        self._warm_up(corpus)
+        
+        # Manifest the served corpus came from, compared against by the watcher
+        self._manifest_mtime = manifest_mtime
+        return corpus
+    
+    def _warm_up(self, corpus: Corpus):
+        """Run one retrieval per language so lazily computed state exists before serving
+        
+        Under a preloading server this happens in the master, so forked workers
+        inherit the cached mean vectors and NumPy's one-time initialisation
+        instead of each writing a private copy on their first request.
+        """
+        with self.pinned_corpus(corpus):
+            for language, index in corpus.language_indexes.items():
+                try:
+                    index.mean_vector()
+                    index.doc_lengths('text')
+                    self._get_relevant_contexts_semantic(['hello'], language, 1)
+                    if Config.RETRIEVAL_FUSION != 'off':
+                        self._get_relevant_contexts_hybrid(['hello'], language, 1)
+                    self._get_relevant_context_text('hello', language, 1)
+                except Exception as e:
+                    logger.warning(f"Warm-up retrieval failed for {language}: {e}")
+    
+    def _load_rag_json(self, state: dict):
+        """Load embeddings and metadata from rag_data.json on Hugging Face"""
+        # Download from Hugging Face
+        self._set_load_stage(state, 'downloading')
+        data_path = hf_hub_download(
+            repo_id=Config.HF_REPO_ID, 
+            filename="rag_data.json"
+        )
+        
+        self._set_load_stage(state, 'parsing')
+        with open(data_path, 'rb') as f:
+            raw = f.read()
+        rag_data = json.loads(raw)
+        
+        # Load embeddings AND metadata (columnar, the per-document dicts are dropped)
+        embeddings = np.asarray(rag_data['embeddings'], dtype=np.float32)
+        metadata = MetadataStore.from_records(rag_data['metadata'])
+        corpus_version = hashlib.sha256(raw).hexdigest()[:12]
+        return embeddings, metadata, rag_data['model_info'], corpus_version
+    
+    def get_completion(self, query: str, language: str, top_k: int = 3, use_cache: bool = True) -> dict:
+        """Get RAG-enhanced completion with smart query preprocessing
+        
+        use_cache=False skips the response cache lookup (the fresh answer is still stored).
+        Raises ServiceNotReady if the corpus is still loading after CORPUS_READY_TIMEOUT,
+        and Overloaded if a generation is needed but no slot is free.
+        """
+        self.ensure_ready()
+        
+        with self.pinned_corpus(), STAGE_SECONDS.time('completion', language):
+            try:
+                # Extract the actual word/phrase the user wants to translate
+                with STAGE_SECONDS.time('extract_terms', language):
+                    extracted_terms = self._extract_translation_terms(query)
+                
+                with STAGE_SECONDS.time('direct_answer', language):
+                    direct = self._direct_answer(query, language, top_k, extracted_terms)
+                if direct is not None:
+                    return direct
+                
+                context = self._retrieve_context(query, language, top_k, extracted_terms)
                 
-                # If we found good matches, we can stop
-                if len(context) >= top_k:
-                    break
+                return self._generate_completion(query, language, top_k, context, extracted_terms, use_cache)
+                
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                logger.error(f"Error in RAG completion: {str(e)}")
+                return self._fallback_completion(query, language)
+    
+    def get_completions(self, requests: list) -> list:
+        """Batch variant of get_completion
+        
+        requests is a list of {query, language, top_k} dicts. Retrieval for each
+        language is scored with one GEMM, generation runs on a bounded pool.
+        Results come back in request order, in the get_completion shape.
+        """
+        self.ensure_ready()
+        
+        with self.pinned_corpus():
+            retrieved = self._retrieve_batch(requests)
             
-            # Remove duplicates and limit
-            context = self._deduplicate_context(context)[:top_k]
+            # Pool threads run in a copy of this context, so they see the same corpus
+            futures = [
+                self._executor.submit(
+                    contextvars.copy_context().run, self._complete_batch_item, request, retrieved[position]
+                )
+                for position, request in enumerate(requests)
+            ]
+            return [future.result() for future in futures]
+    
+    def _retrieve_batch(self, requests: list) -> list:
+        """(context, extracted_terms) per request, or None where retrieval failed"""
+        retrieved = [None] * len(requests)
+        
+        by_language = {}
+        for position, request in enumerate(requests):
+            by_language.setdefault(request['language'], []).append(position)
+        
+        for language, positions in by_language.items():
+            try:
+                extracted = {p: self._extract_translation_terms(requests[p]['query']) for p in positions}
+                
+                # Every candidate text of the group goes into a single query matrix (one observation)
+                with STAGE_SECONDS.time('retrieval', language):
+                    semantic_contexts = self._score_candidates(
+                        [(requests[p]['query'], extracted[p]) for p in positions],
+                        language,
+                        max(requests[p]['top_k'] for p in positions)
+                    )
+                
+                for p in positions:
+                    context = self._retrieve_context(
+                        requests[p]['query'], language, requests[p]['top_k'], extracted[p], semantic_contexts
+                    )
+                    retrieved[p] = (context, extracted[p])
+            except Exception as e:
+                logger.error(f"Error in batch retrieval for {language}: {str(e)}")
+        
+        return retrieved
+    
+    def _complete_batch_item(self, request: dict, retrieved) -> dict:
+        """Generate one batch item, falling back like get_completion does"""
+        try:
+            if retrieved is None:
+                raise RuntimeError("retrieval failed")
+            context, extracted_terms = retrieved
+            direct = self._direct_answer(request['query'], request['language'], request['top_k'], extracted_terms)
+            if direct is not None:
+                return direct
+            return self._generate_completion(
+                request['query'], request['language'], request['top_k'], context, extracted_terms,
+                request.get('use_cache', True)
+            )
+        except Overloaded as e:
+            return self._overloaded_item(request, e)
+        except Exception as e:
+            logger.error(f"Error in RAG completion: {str(e)}")
+            return self._fallback_completion(request['query'], request['language'])
+    
+    @staticmethod
+    def _overloaded_item(request: dict, error: Overloaded) -> dict:
+        """Batch entry for an item shed for lack of a generation slot"""
+        return {
+            'error': 'Service overloaded',
+            'query': request['query'],
+            'language': request['language'],
+            'retry_after': error.retry_after
+        }
+    
+    async def get_completion_async(self, query: str, language: str, top_k: int = 3, use_cache: bool = True) -> dict:
+        """Async variant of get_completion for the ASGI server
+        
+        Retrieval is in-memory NumPy work and runs inline; only generation is
+        awaited, through the semaphore-bounded async model client.
+        """
+        await self.ensure_ready_async()
+        
+        with self.pinned_corpus(), STAGE_SECONDS.time('completion', language):
+            try:
+                with STAGE_SECONDS.time('extract_terms', language):
+                    extracted_terms = self._extract_translation_terms(query)
+                
+                with STAGE_SECONDS.time('direct_answer', language):
+                    direct = self._direct_answer(query, language, top_k, extracted_terms)
+                if direct is not None:
+                    return direct
+                
+                context = self._retrieve_context(query, language, top_k, extracted_terms)
+                
+                return await self._generate_completion_async(
+                    query, language, top_k, context, extracted_terms, use_cache
+                )
+                
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                logger.error(f"Error in RAG completion: {str(e)}")
+                return await self._fallback_completion_async(query, language)
+    
+    async def get_completions_async(self, requests: list) -> list:
+        """Async variant of get_completions; generations are awaited concurrently"""
+        await self.ensure_ready_async()
+        
+        # gather() wraps each item in a task holding a copy of this context
+        with self.pinned_corpus():
+            retrieved = self._retrieve_batch(requests)
+            return await asyncio.gather(*(
+                self._complete_batch_item_async(request, retrieved[position])
+                for position, request in enumerate(requests)
+            ))
+    
+    async def _complete_batch_item_async(self, request: dict, retrieved) -> dict:
+        """Async variant of _complete_batch_item"""
+        try:
+            if retrieved is None:
+                raise RuntimeError("retrieval failed")
+            context, extracted_terms = retrieved
+            direct = self._direct_answer(request['query'], request['language'], request['top_k'], extracted_terms)
+            if direct is not None:
+                return direct
+            return await self._generate_completion_async(
+                request['query'], request['language'], request['top_k'], context, extracted_terms,
+                request.get('use_cache', True)
+            )
+        except Overloaded as e:
+            return self._overloaded_item(request, e)
+        except Exception as e:
+            logger.error(f"Error in RAG completion: {str(e)}")
+            return await self._fallback_completion_async(request['query'], request['language'])
+    
+    def _retrieve_context(self, query: str, language: str, top_k: int, extracted_terms: list,
+                          semantic_contexts: dict = None) -> list:
+        """Pick the context for a query: extracted terms first, the full query as fallback
+        
+        semantic_contexts maps text -> results scored with at least top_k; when
+        omitted, the terms and the query are scored here in one pass. Hybrid
+        results already include every lexical match, so only semantic-only
+        results (RETRIEVAL_FUSION = off) fall back to the text overlap scan.
+        """
+        if semantic_contexts is None:
+            with STAGE_SECONDS.time('retrieval', language):
+                semantic_contexts = self._score_candidates([(query, extracted_terms)], language, top_k)
+        text_fallback = Config.RETRIEVAL_FUSION == 'off'
+        
+        # Try finding context with extracted terms first
+        context = []
+        for term in extracted_terms:
+            term_context = semantic_contexts[term][:top_k]
+            if not term_context and text_fallback:
+                with STAGE_SECONDS.time('text_fallback', language):
+                    term_context = self._get_relevant_context_text(term, language, top_k)
+            context.extend(term_context)
             
-            # If no specific terms found, try with full query
-            if not context:
-                context = self._get_relevant_context_semantic(query, language, top_k)
-                if not context:
+            # If we found good matches, we can stop
+            if len(context) >= top_k:
+                break
+        
+        # Remove duplicates and limit
+        context = self._deduplicate_context(context)[:top_k]
+        
+        # If no specific terms found, try with full query
+        if not context:
+            context = semantic_contexts[query][:top_k]
+            if not context and text_fallback:
+                with STAGE_SECONDS.time('text_fallback', language):
                     context = self._get_relevant_context_text(query, language, top_k)
-            
-            # Create enhanced prompt
+        
+        if not context:
+            EMPTY_CONTEXT.inc(language)
+        return context
+    
+    def _score_candidates(self, candidates: list, language: str, top_k: int) -> dict:
+        """Results for every extracted term and full query, stacked into one GEMM
+        
+        candidates is a list of (query, extracted_terms); returns text -> context.
+        Hybrid (fused lexical + semantic) unless RETRIEVAL_FUSION is off.
+        """
+        texts = list(dict.fromkeys(
+            text
+            for query, extracted_terms in candidates
+            for text in list(extracted_terms) + [query]
+        ))
+        if Config.RETRIEVAL_FUSION == 'off':
+            return dict(zip(texts, self._get_relevant_contexts_semantic(texts, language, top_k)))
+        return dict(zip(texts, self._get_relevant_contexts_hybrid(texts, language, top_k)))
+    
+    def _generate_completion(self, query: str, language: str, top_k: int, context: list,
+                             extracted_terms: list, use_cache: bool = True) -> dict:
+        """Build the prompt from retrieved context and call the model, going through the response cache"""
+        enhanced_prompt, cache_keys, cached = self._prepare_generation(
+            query, language, top_k, context, extracted_terms, use_cache
+        )
+        if cached is not None:
+            return cached
+        
+        # Generate response
+        with STAGE_SECONDS.time('generate', language):
+            response_text = self._generate_text(enhanced_prompt)
+        
+        return self._finish_generation(query, language, context, cache_keys, response_text)
+    
+    async def _generate_completion_async(self, query: str, language: str, top_k: int, context: list,
+                                         extracted_terms: list, use_cache: bool = True) -> dict:
+        """Async variant of _generate_completion"""
+        enhanced_prompt, cache_keys, cached = self._prepare_generation(
+            query, language, top_k, context, extracted_terms, use_cache
+        )
+        if cached is not None:
+            return cached
+        
+        with STAGE_SECONDS.time('generate', language):
+            response_text = await self._generate_text_async(enhanced_prompt)
+        
+        return self._finish_generation(query, language, context, cache_keys, response_text)
+    
+    def _prepare_generation(self, query: str, language: str, top_k: int, context: list,
+                            extracted_terms: list, use_cache: bool):
+        """Create the enhanced prompt and look it up; returns (prompt, cache keys, cached result)"""
+        # Create enhanced prompt
+        with STAGE_SECONDS.time('prompt', language):
             enhanced_prompt = self._create_enhanced_prompt(query, language, context, extracted_terms)
-            
-            # Generate response
-            logger.info(f"Extracted terms: {extracted_terms}")
-            logger.info(f"Found {len(context)} relevant contexts: {context}")
-            response = self.model.generate_content(enhanced_prompt)
-            
-            return {
-                'response': response.text,
-                'sources': [item['phrase'] for item in context],
+        
+        with STAGE_SECONDS.time('cache_lookup', language):
+            cache_keys = self._cache_keys(query, language, top_k, context, extracted_terms)
+            cached = self._cached_response(cache_keys, use_cache)
+        if cached is not None:
+            logger.info(f"Response cache hit for {language}: {query}")
+            return enhanced_prompt, cache_keys, {
+                'response': cached['response'],
+                'sources': cached['sources'],
                 'language': language,
-                'query': query
+                'query': query,
+                'corpus_version': self.corpus_version
             }
-            
+        
+        logger.info(f"Extracted terms: {extracted_terms}")
+        logger.info(f"Found {len(context)} relevant contexts: {context}")
+        return enhanced_prompt, cache_keys, None
+    
+    def _finish_generation(self, query: str, language: str, context: list, cache_keys, response_text: str) -> dict:
+        """Shape the completion result and store it in the response caches"""
+        result = {
+            'response': response_text,
+            'sources': [item['phrase'] for item in context],
+            'language': language,
+            'query': query,
+            'corpus_version': self.corpus_version
+        }
+        
+        self._store_response(cache_keys, {'response': result['response'], 'sources': result['sources']})
+        
+        return result
+    
+    def stream_completion(self, query: str, language: str, top_k: int = 3, use_cache: bool = True):
+        """Streaming variant of get_completion
+        
+        Yields (event, data) pairs: 'sources' as soon as retrieval is done, then
+        one 'chunk' per piece of generated text, then 'done' (or 'error' if the
+        upstream stream breaks after text has already been sent, or if no
+        generation slot is free; the latter carries retry_after).
+        """
+        self.ensure_ready()
+        
+        corpus = self.corpus
+        try:
+            with self.pinned_corpus(corpus):
+                with STAGE_SECONDS.time('extract_terms', language):
+                    extracted_terms = self._extract_translation_terms(query)
+                with STAGE_SECONDS.time('direct_answer', language):
+                    direct = self._direct_answer(query, language, top_k, extracted_terms)
+                if direct is None:
+                    context = self._retrieve_context(query, language, top_k, extracted_terms)
         except Exception as e:
-            logger.error(f"Error in RAG completion: {str(e)}")
-            return self._fallback_completion(query, language)
+            logger.error(f"Error in RAG streaming retrieval: {str(e)}")
+            result = self._fallback_completion(query, language)
+            yield 'sources', {'sources': [], 'language': language, 'query': query, 'corpus_version': corpus.version}
+            yield 'chunk', {'text': result['response']}
+            yield 'done', {'cached': False}
+            return
+        
+        if direct is not None:
+            yield 'sources', {'sources': direct['sources'], 'language': language, 'query': query, 'corpus_version': corpus.version}
+            yield 'chunk', {'text': direct['response']}
+            yield 'done', {'cached': False, 'direct_answer': True}
+            return
+        
+        sources = [item['phrase'] for item in context]
+        yield 'sources', {'sources': sources, 'language': language, 'query': query, 'corpus_version': corpus.version}
+        
+        with STAGE_SECONDS.time('cache_lookup', language):
+            cache_keys = self._cache_keys(query, language, top_k, context, extracted_terms)
+            cached = self._cached_response(cache_keys, use_cache)
+        if cached is not None:
+            yield 'chunk', {'text': cached['response']}
+            yield 'done', {'cached': True}
+            return
+        
+        with STAGE_SECONDS.time('prompt', language):
+            enhanced_prompt = self._create_enhanced_prompt(query, language, context, extracted_terms)
+        parts = []
+        started = time.perf_counter()
+        try:
+            # The slot is held for the whole stream
+            with self.generation_gate.slot():
+                for chunk in self.model.generate_content(enhanced_prompt, stream=True):
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield 'chunk', {'text': text}
+        except Overloaded as e:
+            yield 'error', {'message': 'Service overloaded', 'retry_after': e.retry_after}
+            return
+        except Exception as e:
+            logger.error(f"Error in RAG streaming generation: {str(e)}")
+            if parts:
+                yield 'error', {'message': 'Generation interrupted'}
+                return
+            # Nothing sent yet, so the usual fallback answer can still be given
+            result = self._fallback_completion(query, language)
+            yield 'chunk', {'text': result['response']}
+            yield 'done', {'cached': False}
+            return
+        
+        STAGE_SECONDS.observe(time.perf_counter() - started, 'generate_stream', language)
+        self._store_response(cache_keys, {'response': ''.join(parts), 'sources': sources})
+        yield 'done', {'cached': False}
     
-    def _extract_translation_terms(self, query: str) -> list:
-        """Extract the actual words/phrases user wants to translate"""
-        query_lower = query.lower().strip()
-        extracted_terms = []
-        
-        # Try each pattern
-        for pattern in self.translation_patterns:
-            matches = re.findall(pattern, query_lower, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    # For patterns with multiple groups, take the relevant one
-                    term = match[0] if match[0] else match[1] if len(match) > 1 else ""
-                else:
-                    term = match
-                
-                if term and len(term.strip()) > 0:
-                    # Clean up the term
-                    term = term.strip().strip('"\'').strip('?.,!').strip()
-                    if term and len(term) > 1:  # Avoid single characters
-                        extracted_terms.append(term)
-        
-        # If no patterns matched, try to extract quoted words
-        quoted_matches = re.findall(r'["\']([^"\']+)["\']', query)
-        for match in quoted_matches:
-            match = match.strip()
-            if match and len(match) > 1:
-                extracted_terms.append(match)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_terms = []
-        for term in extracted_terms:
-            if term.lower() not in seen:
-                seen.add(term.lower())
-                unique_terms.append(term)
+    async def stream_completion_async(self, query: str, language: str, top_k: int = 3, use_cache: bool = True):
+        """Async variant of stream_completion, yielding the same (event, data) pairs"""
+        await self.ensure_ready_async()
+        
+        corpus = self.corpus
+        try:
+            with self.pinned_corpus(corpus):
+                with STAGE_SECONDS.time('extract_terms', language):
+                    extracted_terms = self._extract_translation_terms(query)
+                with STAGE_SECONDS.time('direct_answer', language):
+                    direct = self._direct_answer(query, language, top_k, extracted_terms)
+                if direct is None:
+                    context = self._retrieve_context(query, language, top_k, extracted_terms)
+        except Exception as e:
+            logger.error(f"Error in RAG streaming retrieval: {str(e)}")
+            result = await self._fallback_completion_async(query, language)
+            yield 'sources', {'sources': [], 'language': language, 'query': query, 'corpus_version': corpus.version}
+            yield 'chunk', {'text': result['response']}
+            yield 'done', {'cached': False}
+            return
+        
+        if direct is not None:
+            yield 'sources', {'sources': direct['sources'], 'language': language, 'query': query, 'corpus_version': corpus.version}
+            yield 'chunk', {'text': direct['response']}
+            yield 'done', {'cached': False, 'direct_answer': True}
+            return
+        
+        sources = [item['phrase'] for item in context]
+        yield 'sources', {'sources': sources, 'language': language, 'query': query, 'corpus_version': corpus.version}
+        
+        with STAGE_SECONDS.time('cache_lookup', language):
+            cache_keys = self._cache_keys(query, language, top_k, context, extracted_terms)
+            cached = self._cached_response(cache_keys, use_cache)
+        if cached is not None:
+            yield 'chunk', {'text': cached['response']}
+            yield 'done', {'cached': True}
+            return
+        
+        with STAGE_SECONDS.time('prompt', language):
+            enhanced_prompt = self._create_enhanced_prompt(query, language, context, extracted_terms)
+        parts = []
+        started = time.perf_counter()
+        try:
+            async for text in self.async_client.stream_text(self.model, enhanced_prompt):
+                if text:
+                    parts.append(text)
+                    yield 'chunk', {'text': text}
+        except Overloaded as e:
+            yield 'error', {'message': 'Service overloaded', 'retry_after': e.retry_after}
+            return
+        except Exception as e:
+            logger.error(f"Error in RAG streaming generation: {str(e)}")
+            if parts:
+                yield 'error', {'message': 'Generation interrupted'}
+                return
+            result = await self._fallback_completion_async(query, language)
+            yield 'chunk', {'text': result['response']}
+            yield 'done', {'cached': False}
+            return
+        
+        STAGE_SECONDS.observe(time.perf_counter() - started, 'generate_stream', language)
+        self._store_response(cache_keys, {'response': ''.join(parts), 'sources': sources})
+        yield 'done', {'cached': False}
+    
+    def _response_cache_key(self, query: str, language: str, top_k: int, context: list, extracted_terms: list):
+        """Response cache key, or None when caching is disabled"""
+        if self.response_cache is None:
+            return None
+        # The prompt rendered around a placeholder covers both the context and the template
+        fingerprint = hashlib.sha256(
+            self._create_enhanced_prompt(QUERY_PLACEHOLDER, language, context, extracted_terms).encode('utf-8')
+        ).hexdigest()
+        return make_cache_key(query, language, top_k, fingerprint)
+    
+    def _cache_keys(self, query: str, language: str, top_k: int, context: list, extracted_terms: list) -> CacheKeys:
+        """Keys of a generation in the response cache and the semantic cache (None where disabled)"""
+        response_key = self._response_cache_key(query, language, top_k, context, extracted_terms)
+        if self.semantic_cache is None:
+            return CacheKeys(response_key, None, None, None)
+        
+        # Only a retrieval outcome with terms and sources identifies the question
+        semantic_key = None
+        if extracted_terms and context:
+            semantic_key = make_semantic_key(extracted_terms, [item['doc_id'] for item in context])
+        return CacheKeys(
+            response_key, (language, top_k, self.corpus_version), semantic_key,
+            self._semantic_cache_embedding(query, language)
+        )
+    
+    def _semantic_cache_embedding(self, query: str, language: str):
+        """Query embedding for the similarity tier, or None when it is off or the query matches no term"""
+        if Config.SEMANTIC_CACHE_SIMILARITY <= 0:
+            return None
+        lang_index = self.corpus.language_indexes.get(language)
+        if lang_index is None:
+            return None
+        words = self._query_words(lang_index, query)
+        # Without a vocabulary term the pseudo-embedding is the language mean, close to every such query
+        if not any(word in lang_index.term_ids for word in words):
+            return None
+        return lang_index.pseudo_embeddings([words])[0]
+    
+    def _cached_response(self, cache_keys: CacheKeys, use_cache: bool = True):
+        """Cached {response, sources} for the exact query, else for a near-duplicate question"""
+        if not use_cache:
+            return None
+        if cache_keys.response is not None:
+            cached = self.response_cache.get(cache_keys.response)
+            if cached is not None:
+                return cached
+        if self.semantic_cache is not None and (cache_keys.semantic is not None or cache_keys.embedding is not None):
+            return self.semantic_cache.get(cache_keys.scope, cache_keys.semantic, cache_keys.embedding)
+        return None
+    
+    def _store_response(self, cache_keys: CacheKeys, value: dict):
+        """Store a generated {response, sources} in both caches"""
+        if cache_keys.response is not None:
+            self.response_cache.set(cache_keys.response, value)
+        if cache_keys.semantic is not None:
+            self.semantic_cache.set(cache_keys.scope, cache_keys.semantic, value, cache_keys.embedding)
+    
+    def _direct_answer(self, query: str, language: str, top_k: int, extracted_terms: list):
+        """Templated answer from exact dictionary matches, or None to go through the model
+        
+        Only with DIRECT_ANSWER_ENABLED, and only when some extracted term (or
+        the query itself) equals a phrase or translation of the language,
+        exactly or in normalised form, and the matched terms plus question
+        words account for every word of the query.
+        """
+        if not Config.DIRECT_ANSWER_ENABLED:
+            return None
         
-        return unique_terms
+        corpus = self.corpus
+        lang_index = corpus.language_indexes.get(language)
+        if lang_index is None or lang_index.term_lookups is None:
+            return None
+        
+        terms = {}
+        for term in list(extracted_terms) + [query.strip().strip('"\'?.,!')]:
+            term = _LANGUAGE_SUFFIX.sub('', term).strip()
+            terms.setdefault(term.lower(), term)
+        
+        matches = []
+        for term in terms.values():
+            form, local_ids, fields = lang_index.match_term(term)
+            if form is not None:
+                matches.append((term, local_ids, fields))
+        
+        covered = {word for term, _, _ in matches for word in re.findall(r'\w+', term.lower())}
+        if not matches or set(re.findall(r'\w+', query.lower())) - covered - DIRECT_ANSWER_FILLER_WORDS:
+            return None
+        
+        lines = []
+        sources = []
+        for term, local_ids, fields in matches:
+            answers = {field: [] for field in LOOKUP_FIELDS}
+            for local_id, field in zip(local_ids.tolist(), fields.tolist()):
+                doc_id = int(lang_index.ids[local_id])
+                matched = LOOKUP_FIELDS[field]
+                answer = corpus.metadata.translation(doc_id) if matched == 'phrase' else corpus.metadata.phrase(doc_id)
+                if answer not in answers[matched] and len(answers[matched]) < top_k:
+                    answers[matched].append(answer)
+                    phrase = corpus.metadata.phrase(doc_id)
+                    if phrase not in sources:
+                        sources.append(phrase)
+            
+            for matched in ('translation', 'phrase'):
+                if answers[matched]:
+                    lines.append(DIRECT_ANSWER_TEMPLATES[matched].format(
+                        term=term, language=language.title(), answers='; '.join(answers[matched])
+                    ))
+        
+        logger.info(f"Direct answer for {language}: {query}")
+        return {
+            'response': '\n'.join(lines),
+            'sources': sources,
+            'language': language,
+            'query': query,
+            'corpus_version': corpus.version,
+            'direct_answer': True
+        }
+    
+    def _extract_translation_terms(self, query: str) -> list:
+        """Extract the actual words/phrases user wants to translate, best first"""
+        return list(query_parser.parse(query).terms)
     
     def _deduplicate_context(self, context: list) -> list:
         """Remove duplicate context items"""
+        metadata = self.corpus.metadata
         seen_phrases = set()
         unique_context = []
         
         for item in context:
-            phrase_key = item['phrase'].lower()
+            # Pre-lowered phrase from the store for corpus items
+            phrase_key = metadata.text('phrase_lower', item['doc_id']) if 'doc_id' in item else item['phrase'].lower()
             if phrase_key not in seen_phrases:
                 seen_phrases.add(phrase_key)
                 unique_context.append(item)
@@ -169,123 +993,194 @@ class RAGService:
 
     def _get_relevant_context_semantic(self, query: str, language: str, top_k: int) -> list:
         """Use pre-computed embeddings for semantic similarity (EFFICIENT!)"""
-        if self.embeddings is None or language not in self.language_indices:
-            return []
+        return self._get_relevant_contexts_semantic([query], language, top_k)[0]
+    
+    def _get_relevant_contexts_semantic(self, queries: list, language: str, top_k: int) -> list:
+        """Semantic contexts for several queries of one language, scored with a single GEMM"""
+        corpus = self.corpus
+        if corpus.embeddings is None or language not in corpus.language_indices or not queries:
+            return [[] for _ in queries]
         
         try:
-            # Get language-specific embeddings
-            lang_indices = self.language_indices[language]
-            lang_embeddings = self.embeddings[lang_indices]
+            # Language block: contiguous, already L2-normalised float32 rows
+            lang_index = corpus.language_indexes[language]
             
-            # Simple query embedding using TF-IDF-like approach (no external models!)
-            query_embedding = self._create_simple_query_embedding(query, language)
+            # Simple query embeddings using TF-IDF-like approach (no external models!)
+            query_embeddings = self._create_query_embeddings(queries, language)
             
-            # Calculate cosine similarity
-            similarities = self._cosine_similarity(query_embedding, lang_embeddings)
+            contexts = []
+            for local_ids, scores in self._nearest_documents(query_embeddings, lang_index, top_k):
+                context = []
+                for local_idx, score in zip(local_ids, scores.tolist()):  # top_k most similar, best first
+                    if score <= 0.1:  # Filter low scores
+                        continue
+                    
+                    context.append(self._context_item(corpus.metadata, int(lang_index.ids[local_idx]), score))
+                contexts.append(context)
+            
+            return contexts
+            
+        except Exception as e:
+            logger.error(f"Error in semantic search: {e}")
+            return [[] for _ in queries]
+    
+    def _get_relevant_contexts_hybrid(self, queries: list, language: str, top_k: int) -> list:
+        """Contexts ranked by fused BM25 and cosine scores, for several queries of one language
+        
+        Per query, the HYBRID_CANDIDATES best documents by cosine and by BM25
+        form one candidate set. Its exact cosine scores come from one gather
+        and product over the float32 rows, then both signals are fused
+        (RETRIEVAL_FUSION, HYBRID_*_WEIGHT). A candidate needs a lexical match
+        or a cosine above 0.1, like the semantic and text scorers it replaces.
+        """
+        corpus = self.corpus
+        if corpus.embeddings is None or language not in corpus.language_indices or not queries:
+            return [[] for _ in queries]
+        
+        try:
+            lang_index = corpus.language_indexes[language]
             
-            # Get top_k most similar
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
+            # The same (typo-corrected) tokens drive the query embedding and BM25
+            queries_words = [self._query_words(lang_index, query) for query in queries]
+            query_embeddings = lang_index.pseudo_embeddings(queries_words)
+            unit_queries = query_embeddings / (np.linalg.norm(query_embeddings, axis=-1, keepdims=True) + 1e-8)
+            pool = max(top_k, Config.HYBRID_CANDIDATES)
             
-            context = []
-            for local_idx in top_indices:
-                global_idx = lang_indices[local_idx]
-                meta = self.metadata[global_idx]
+            contexts = []
+            nearest = self._nearest_documents(query_embeddings, lang_index, pool)
+            for words, unit_query, (semantic_ids, _) in zip(queries_words, unit_queries, nearest):
+                lexical_ids, bm25 = lang_index.bm25_scores(words, Config.BM25_K1, Config.BM25_B)
+                if len(lexical_ids) > pool:
+                    best = top_k_indices(bm25, pool)
+                    lexical_ids, bm25 = lexical_ids[best], bm25[best]
+                
+                candidates = np.union1d(semantic_ids, lexical_ids)
+                cosine = lang_index.vectors[candidates] @ unit_query.astype(np.float32)
+                lexical = np.zeros(len(candidates))
+                lexical[np.searchsorted(candidates, lexical_ids)] = bm25
                 
-                context.append({
-                    'phrase': meta['phrase'],
-                    'translation': meta['translation'],
-                    'category': meta.get('category', 'general'),
-                    'score': float(similarities[local_idx])
-                })
+                fused = fuse_scores(
+                    cosine, lexical, Config.RETRIEVAL_FUSION, Config.HYBRID_SEMANTIC_WEIGHT,
+                    Config.HYBRID_LEXICAL_WEIGHT, Config.RRF_K
+                )
+                admissible = np.flatnonzero((cosine > 0.1) | (lexical > 0))
+                ranked = admissible[np.argsort(-fused[admissible], kind='stable')[:top_k]]
+                contexts.append([
+                    self._context_item(corpus.metadata, int(lang_index.ids[candidates[pos]]), float(fused[pos]))
+                    for pos in ranked
+                ])
             
-            return [item for item in context if item['score'] > 0.1]  # Filter low scores
+            return contexts
             
         except Exception as e:
-            logger.error(f"Error in semantic search: {e}")
-            return []
+            logger.error(f"Error in hybrid search: {e}")
+            return [[] for _ in queries]
+    
+    def _nearest_documents(self, query_embeddings: np.ndarray, lang_index, top_k: int) -> list:
+        """(local documents, scores) of the top_k most similar rows per query, best first
+        
+        Languages built with an IVF index are searched approximately over
+        ANN_NPROBE lists, and those with a float16/int8 scan block keep a
+        RERANK_SHORTLIST that is re-scored in float32. The others (and
+        ANN_NPROBE = 0 without a scan block) use exact cosine similarity, one
+        matrix product for all queries.
+        """
+        use_ivf = lang_index.ivf is not None and Config.ANN_NPROBE > 0
+        if use_ivf or lang_index.quantized is not None:
+            queries = query_embeddings / (np.linalg.norm(query_embeddings, axis=-1, keepdims=True) + 1e-8)
+            return lang_index.search(
+                queries.astype(np.float32, copy=False), top_k,
+                Config.ANN_NPROBE if use_ivf else 0, Config.RERANK_SHORTLIST
+            )
+        
+        similarities = self._cosine_similarity(query_embeddings, lang_index.vectors)
+        results = []
+        for row in similarities:
+            best = top_k_indices(row, top_k)
+            results.append((best, row[best]))
+        return results
     
     def _create_simple_query_embedding(self, query: str, language: str) -> np.ndarray:
         """Create a simple query embedding without external models"""
+        return self._create_query_embeddings([query], language)[0]
+    
+    def _create_query_embeddings(self, queries: list, language: str) -> np.ndarray:
+        """Create simple query embeddings for several queries at once"""
         # Use pre-computed embeddings to create a pseudo-embedding
         # This is a clever trick to avoid needing sentence-transformers!
+        corpus = self.corpus
+        lang_index = corpus.language_indexes.get(language)
         
-        query_words = set(query.lower().split())
+        # Ultimate fallback: zero vectors
+        if lang_index is None:
+            return np.zeros((len(queries), corpus.embeddings.shape[1]), dtype=np.float32)
         
-        # Find documents that match query words
-        matching_embeddings = []
-        lang_indices = self.language_indices.get(language, [])
+        return lang_index.pseudo_embeddings([self._query_words(lang_index, query) for query in queries])
+    
+    def _query_words(self, lang_index, text: str) -> set:
+        """Query tokens for lexical matching
         
-        for idx in lang_indices:
-            meta = self.metadata[idx]
-            doc_words = set((meta['phrase'] + ' ' + meta['translation']).lower().split())
-            
-            # If query words overlap with document words, use that embedding
-            overlap = len(query_words.intersection(doc_words))
-            if overlap > 0:
-                weight = overlap / len(query_words)
-                matching_embeddings.append((weight, self.embeddings[idx]))
-        
-        if matching_embeddings:
-            # Weighted average of matching embeddings
-            total_weight = sum(weight for weight, _ in matching_embeddings)
-            if total_weight > 0:
-                weighted_embedding = sum(
-                    weight * embedding for weight, embedding in matching_embeddings
-                ) / total_weight
-                return weighted_embedding
-        
-        # Fallback: average of all language embeddings (rough approximation)
-        if lang_indices:
-            return np.mean(self.embeddings[lang_indices], axis=0)
-        
-        # Ultimate fallback: zero vector
-        return np.zeros(self.embeddings.shape[1])
+        When none of them is in the language vocabulary (the query would match
+        nothing), misspelled words are replaced by their closest vocabulary
+        terms, up to FUZZY_MAX_EDITS edits.
+        """
+        words = set(tokenize(text))
+        if Config.FUZZY_MAX_EDITS > 0 and not any(word in lang_index.term_ids for word in words):
+            return lang_index.correct_words(words, Config.FUZZY_MAX_EDITS)
+        return words
     
     def _cosine_similarity(self, query_vec: np.ndarray, doc_vecs: np.ndarray) -> np.ndarray:
-        """Efficient cosine similarity calculation"""
-        # Normalize vectors
-        query_norm = query_vec / (np.linalg.norm(query_vec) + 1e-8)
-        doc_norms = doc_vecs / (np.linalg.norm(doc_vecs, axis=1, keepdims=True) + 1e-8)
+        """Efficient cosine similarity calculation (doc_vecs must be L2-normalised)
+        
+        query_vec may be a single vector or a matrix with one query per row.
+        """
+        # Only the queries need normalising, documents are normalised at index time
+        query_norm = query_vec / (np.linalg.norm(query_vec, axis=-1, keepdims=True) + 1e-8)
         
         # Calculate similarity
-        return np.dot(doc_norms, query_norm)
+        return query_norm.astype(doc_vecs.dtype, copy=False) @ doc_vecs.T
     
     def _get_relevant_context_text(self, query: str, language: str, top_k: int) -> list:
         """Fallback text-based similarity (your existing method, simplified)"""
-        if not self.metadata or language not in self.language_indices:
+        corpus = self.corpus
+        if not corpus.metadata or language not in corpus.language_indices:
             return []
         
-        query_words = set(query.lower().split())
-        lang_indices = self.language_indices[language]
+        lang_index = corpus.language_indexes[language]
+        query_words = self._query_words(lang_index, query)
         
-        scored_docs = []
-        for idx in lang_indices:
-            meta = self.metadata[idx]
-            
-            # Simple word overlap score
-            phrase_words = set(meta['phrase'].lower().split())
-            translation_words = set(meta['translation'].lower().split())
-            
-            phrase_score = len(query_words.intersection(phrase_words)) / max(len(query_words), 1)
-            translation_score = len(query_words.intersection(translation_words)) / max(len(query_words), 1)
-            
-            total_score = max(phrase_score, translation_score)  # Take best match
-            
-            if total_score > 0:
-                scored_docs.append((total_score, meta))
-        
-        # Sort and return top_k
-        scored_docs.sort(key=lambda x: x[0], reverse=True)
-        
-        return [
-            {
-                'phrase': meta['phrase'],
-                'translation': meta['translation'],
-                'category': meta.get('category', 'general'),
-                'score': score
-            }
-            for score, meta in scored_docs[:top_k]
-        ]
+        # Simple word overlap score, only for documents sharing a token with the query
+        phrase_docs, phrase_overlaps = lang_index.overlap_counts(query_words, 'phrase')
+        translation_docs, translation_overlaps = lang_index.overlap_counts(query_words, 'translation')
+        candidates = np.union1d(phrase_docs, translation_docs)
+        
+        phrase_scores = np.zeros(len(candidates))
+        phrase_scores[np.searchsorted(candidates, phrase_docs)] = phrase_overlaps / max(len(query_words), 1)
+        translation_scores = np.zeros(len(candidates))
+        translation_scores[np.searchsorted(candidates, translation_docs)] = translation_overlaps / max(len(query_words), 1)
+        
+        total_scores = np.maximum(phrase_scores, translation_scores)  # Take best match
+        
+        # Sort and return top_k (stable, so ties keep corpus order)
+        top = np.argsort(-total_scores, kind='stable')[:top_k]
+        
+        context = []
+        for pos in top:
+            context.append(self._context_item(
+                corpus.metadata, int(lang_index.ids[candidates[pos]]), float(total_scores[pos])
+            ))
+        return context
+    
+    @staticmethod
+    def _context_item(metadata: MetadataStore, doc_id: int, score: float) -> dict:
+        """Context entry for one document, read from the columnar metadata"""
+        return {
+            'phrase': metadata.phrase(doc_id),
+            'translation': metadata.translation(doc_id),
+            'category': metadata.category(doc_id),
+            'score': score,
+            'doc_id': doc_id
+        }
     
     def _create_enhanced_prompt(self, query: str, language: str, context: list, extracted_terms: list = None) -> str:
         """Create enhanced prompt with extracted terms awareness"""
@@ -335,20 +1230,66 @@ I don't have specific translations for the requested terms in my knowledge base.
         
         return prompt
     
+    def _generate_text(self, prompt: str) -> str:
+        """Call the model, sharing one upstream call between concurrent identical prompts"""
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        
+        def generate():
+            # Only the leader takes a slot; coalesced callers wait on its result
+            with self.generation_gate.slot():
+                return self.model.generate_content(prompt).text
+        
+        return self.single_flight.do(key, generate, timeout=Config.REQUEST_TIMEOUT)
+    
+    async def _generate_text_async(self, prompt: str) -> str:
+        """Async variant of _generate_text"""
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return await self.async_single_flight.do(
+            key,
+            lambda: self.async_client.generate_text(self.model, prompt),
+            timeout=Config.REQUEST_TIMEOUT
+        )
+    
+    async def _fallback_completion_async(self, query: str, language: str) -> dict:
+        """Async variant of _fallback_completion"""
+        FALLBACK_COMPLETIONS.inc(language)
+        try:
+            with STAGE_SECONDS.time('fallback', language):
+                response_text = await self._generate_text_async(f"As a {language} expert: {query}")
+            return {
+                'response': response_text,
+                'sources': [],
+                'language': language,
+                'query': query,
+                'corpus_version': self.corpus_version
+            }
+        except Exception:
+            return {
+                'response': "Sorry, I'm having technical difficulties.",
+                'sources': [],
+                'language': language,
+                'query': query,
+                'corpus_version': self.corpus_version
+            }
+    
     def _fallback_completion(self, query: str, language: str) -> dict:
         """Lightweight fallback"""
+        FALLBACK_COMPLETIONS.inc(language)
         try:
-            response = self.model.generate_content(f"As a {language} expert: {query}")
+            with STAGE_SECONDS.time('fallback', language):
+                response_text = self._generate_text(f"As a {language} expert: {query}")
             return {
-                'response': response.text,
+                'response': response_text,
                 'sources': [],
                 'language': language,
-                'query': query
+                'query': query,
+                'corpus_version': self.corpus_version
             }
         except:
             return {
                 'response': "Sorry, I'm having technical difficulties.",
                 'sources': [],
                 'language': language,
-                'query': query
+                'query': query,
+                'corpus_version': self.corpus_version
             }
\ No newline at end of file
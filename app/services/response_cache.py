@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return ' '.join(query.lower().split()).strip(' ?!.')
+
+
+def make_cache_key(query: str, language: str, top_k: int, prompt_fingerprint: str) -> str:
+    """Cache key from the normalised query and a fingerprint of context + prompt template"""
+    payload = json.dumps([normalize_query(query), language, top_k, prompt_fingerprint], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of generated responses with an optional SQLite tier
+
+    The in-memory tier is per process. The SQLite tier survives restarts and is
+    shared by every worker on the host that points at the same file. Its
+    connection is opened on first use in each process, since SQLite connections
+    must not be carried across fork() into preforked workers.
+    """
+
+    PURGE_EVERY = 1000  # SQLite writes between expired-row purges
+
+    def __init__(self, max_entries: int, ttl_seconds: float, sqlite_path: str = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._db = None
+        self._db_pid = None
+        self._db_path = sqlite_path or None
+        self._db_lock = threading.Lock()
+        self._db_writes = 0
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss or expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value, expires_at = self._db_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            # Promote to memory for the remainder of its TTL
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: dict):
+        """Store value under key in every tier"""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+        self._db_set(key, value, expires_at)
+
+    def clear(self):
+        """Drop every entry from every tier"""
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'persistent': self._db_path is not None
+            }
+
+    def _store(self, key: str, value: dict, expires_at: float):
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self):
+        """SQLite connection of the current process, or None when memory-only (db lock held)"""
+        if self._db_path is not None and self._db_pid != os.getpid():
+            self._db = self._open_db(self._db_path)
+            self._db_pid = os.getpid()
+            if self._db is None:
+                self._db_path = None
+        return self._db
+
+    def _open_db(self, sqlite_path: str):
+        """Open (and create) the SQLite tier; returns None on failure"""
+        try:
+            db = sqlite3.connect(sqlite_path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.commit()
+            return db
+        except sqlite3.Error as e:
+            logger.error(f"Response cache database unavailable ({sqlite_path}): {e}")
+            return None
+
+    def _db_get(self, key: str, now: float):
+        """Look key up in the SQLite tier; returns (value, expires_at)"""
+        if self._db_path is None:
+            return None, None
+        try:
+            with self._db_lock:
+                db = self._connection()
+                if db is None:
+                    return None, None
+                row = db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Response cache read failed: {e}")
+            return None, None
+        if row is None:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def _db_set(self, key: str, value: dict, expires_at: float):
+        """Write key to the SQLite tier, purging expired rows now and then"""
+        if self._db_path is None:
+            return
+        try:
+            with self._db_lock:
+                db = self._connection()
+                if db is None:
+                    return
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self._db_writes += 1
+                if self._db_writes % self.PURGE_EVERY == 0:
+                    db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Response cache write failed: {e}")
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def make_semantic_key(extracted_terms: list, source_ids: list) -> tuple:
+    """Key of a retrieval outcome: the same terms and ordered sources give the same prompt, whatever the wording"""
+    return tuple(sorted(term.lower() for term in extracted_terms)), tuple(source_ids)
+
+
+class SemanticCache:
+    """Second-level response cache for questions worded differently
+
+    Entries live in a scope, such as (language, top_k, corpus version).
+
+    Sources tier: responses keyed on make_semantic_key, so "how do I say
+    hello?" and "how to say 'hello'" share an answer once both resolve to the
+    same terms and retrieved documents.
+
+    Similarity tier (similarity_threshold > 0): the unit query embeddings of
+    the most recent entries are kept in a ring; a query whose embedding has a
+    cosine of at least the threshold with one of the same scope reuses that
+    entry. Memory only, per process.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float = 0.0,
+                 recent_embeddings: int = 512):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.recent_embeddings = recent_embeddings
+        self._entries = OrderedDict()  # (scope, key) -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        # Ring of recent embeddings: unit rows, the entry key of each row and its scope id
+        self._recent = None
+        self._recent_keys = [None] * recent_embeddings
+        self._recent_scopes = np.full(recent_embeddings, -1, dtype=np.int64)
+        self._scope_ids = {}
+        self._next_row = 0
+
+        self.source_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, scope: tuple, key: tuple = None, embedding=None):
+        """Cached value for key, else for the most similar recent embedding of the scope, else None"""
+        now = time.time()
+        with self._lock:
+            value = self._lookup((scope, key), now) if key is not None else None
+            if value is not None:
+                self.source_hits += 1
+                return value
+
+            similar_key = self._similar_key(scope, embedding)
+            value = self._lookup(similar_key, now) if similar_key is not None else None
+            if value is not None:
+                self.similar_hits += 1
+                return value
+
+            self.misses += 1
+            return None
+
+    def set(self, scope: tuple, key: tuple, value: dict, embedding=None):
+        """Store value under key, and its embedding for similarity lookups"""
+        entry_key = (scope, key)
+        with self._lock:
+            self._entries[entry_key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._remember(entry_key, embedding)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._recent = None
+            self._recent_keys = [None] * self.recent_embeddings
+            self._recent_scopes[:] = -1
+            self._scope_ids.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters per tier and sizes"""
+        with self._lock:
+            hits = self.source_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'similarity_threshold': self.similarity_threshold,
+                'source_hits': self.source_hits,
+                'similar_hits': self.similar_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': hits / lookups if lookups else 0.0
+            }
+
+    def _lookup(self, entry_key: tuple, now: float):
+        """Live value for entry_key, refreshing its LRU position (lock held)"""
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[entry_key]
+            return None
+        self._entries.move_to_end(entry_key)
+        return value
+
+    def _similar_key(self, scope: tuple, embedding):
+        """Entry key of the closest recent embedding of scope at or above the threshold (lock held)"""
+        if self.similarity_threshold <= 0 or embedding is None or self._recent is None:
+            return None
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or len(embedding) != self._recent.shape[1]:
+            return None
+        similarities = self._recent @ _unit(embedding)
+        similarities[self._recent_scopes != scope_id] = -np.inf
+        best = int(np.argmax(similarities))
+        return self._recent_keys[best] if similarities[best] >= self.similarity_threshold else None
+
+    def _remember(self, entry_key: tuple, embedding):
+        """Write the embedding of entry_key into the ring, overwriting the oldest row (lock held)"""
+        if self.similarity_threshold <= 0 or embedding is None or self.recent_embeddings <= 0:
+            return
+        if self._recent is None or self._recent.shape[1] != len(embedding):
+            # First entry, or a corpus with another dimension: start a new ring
+            self._recent = np.zeros((self.recent_embeddings, len(embedding)), dtype=np.float32)
+            self._recent_scopes[:] = -1
+        row = self._next_row
+        self._recent[row] = _unit(embedding)
+        self._recent_keys[row] = entry_key
+        self._recent_scopes[row] = self._scope_ids.setdefault(entry_key[0], len(self._scope_ids))
+        self._next_row = (row + 1) % self.recent_embeddings
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + 1e-8)
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a waiter whose shared call did not finish in time"""
+
+
+class _Call:
+    """One in-flight execution and its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single execution
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result, or its exception. Nothing is kept
+    once the call completes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key, fn, timeout: float = None):
+        """Run fn() once for all concurrent callers using key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for in-flight call")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> dict:
+        """Execution and coalescing counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts
+            }
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for coroutines sharing one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def do(self, key, fn, timeout: float = None):
+        """Await fn() once for all concurrent callers using key"""
+        future = self._calls.get(key)
+        if future is None:
+            future = self._calls[key] = asyncio.get_running_loop().create_future()
+            self.executed += 1
+            try:
+                result = await fn()
+            except BaseException as e:
+                # Cancellation of the leader must not look like cancellation to the waiters
+                error = e if isinstance(e, Exception) else RuntimeError("In-flight call was cancelled")
+                future.set_exception(error)
+                future.exception()  # Mark retrieved; there may be no waiters
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                del self._calls[key]
+
+        self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for in-flight call")
+
+    def stats(self) -> dict:
+        """Execution and coalescing counters"""
+        return {
+            'in_flight': len(self._calls),
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts
+        }
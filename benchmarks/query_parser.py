@@ -0,0 +1,55 @@
+"""Micro-benchmark of query term extraction
+
+    python benchmarks/query_parser.py [--iterations N]
+
+Reports microseconds per parse with the memo disabled (every query parsed)
+and with the shared memo warm (repeated queries).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.query_parser import QueryParser
+from config.settings import Config
+
+QUERIES = [
+    'How do I say hello?',
+    'goodbye',
+    'translate "friend"',
+    'what is water in fulfulde',
+    'How do you say "Good Morning" in Fulfulde?',
+    "What does 'jam' mean?",
+    'fulfulde word for water',
+    'meaning of sannu',
+    'translate water from english to ghomala',
+    'how to say good morning friend?',
+    'numbers',
+    'What is the Ghomala word for market?',
+]
+
+
+def time_parses(parser: QueryParser, iterations: int) -> float:
+    """Mean microseconds per parse over the query mix"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        parser.parse(QUERIES[i % len(QUERIES)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark query term extraction')
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    cold = time_parses(QueryParser(Config.SUPPORTED_LANGUAGES, memo_size=0), args.iterations)
+    warm = time_parses(QueryParser(Config.SUPPORTED_LANGUAGES, memo_size=len(QUERIES)), args.iterations)
+    print(f"{len(QUERIES)} queries, {args.iterations} parses")
+    print(f"compiled, no memo: {cold:8.2f} us/query")
+    print(f"compiled, memo:    {warm:8.2f} us/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""Offline benchmark of RAGService on synthetic corpora with a stand-in model
+
+    python benchmarks/rag_service.py [--sizes 1000,10000,100000,1000000] [--source binary|json]
+                                     [--model-latency MS] [--queries N] [--output FILE] [--compare FILE]
+
+For every corpus size a synthetic corpus is generated (benchmarks/synthetic.py)
+and served either as a binary corpus written like build_index does (default)
+or as rag_data.json. No network access or API key is needed: the model is a
+deterministic stub that answers after --model-latency milliseconds.
+
+Reported per size, as p50/p95/p99 milliseconds and operations per second:
+
+    build_index               offline artifact build (binary source, once)
+    load                      _load_rag_data: map or parse, index, warm up
+    extract_terms             _extract_translation_terms
+    direct_answer             _direct_answer (a no-op unless DIRECT_ANSWER_ENABLED)
+    semantic                  _get_relevant_contexts_semantic
+    hybrid                    _get_relevant_contexts_hybrid
+    text                      _get_relevant_context_text
+    retrieve_context          _retrieve_context
+    completion                get_completion, response caches bypassed
+    completion_concurrent     the same from --concurrency threads
+
+Results are written as JSON (default benchmarks/results/<commit>.json);
+--compare prints the p50/p95 change against an earlier results file. One
+million documents at the default dimension need about 6 GB of memory.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Offline: the stub model replaces Gemini and nothing is downloaded
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+os.environ.setdefault('HF_HUB_OFFLINE', '1')
+
+import app.services.rag_service as rag_service_module  # noqa: E402
+from app.services.corpus_index import build_language_indexes  # noqa: E402
+from app.services.corpus_store import write_corpus  # noqa: E402
+from app.services.metadata_store import MetadataStore  # noqa: E402
+from app.services.query_parser import query_parser  # noqa: E402
+from app.services.rag_service import RAGService  # noqa: E402
+from config.settings import Config  # noqa: E402
+from synthetic import StubModel, generate_corpus, sample_queries, write_rag_json  # noqa: E402
+
+RECORDED_SETTINGS = [
+    'RETRIEVAL_FUSION', 'HYBRID_CANDIDATES', 'ANN_MIN_DOCUMENTS', 'ANN_LISTS', 'ANN_NPROBE', 'EMBEDDING_STORAGE',
+    'RERANK_SHORTLIST', 'FUZZY_MAX_EDITS', 'DIRECT_ANSWER_ENABLED', 'RESPONSE_CACHE_ENABLED', 'SEMANTIC_CACHE_ENABLED'
+]
+
+# Queries run untimed first, so one-time costs do not land in the percentiles
+WARMUP_QUERIES = 10
+
+
+def summarize(latencies: list, wall_seconds: float = None) -> dict:
+    """Latency percentiles in milliseconds and throughput (ops/s over wall_seconds, else over the sum)"""
+    ms = np.asarray(latencies, dtype=np.float64) * 1e3
+    wall = wall_seconds if wall_seconds is not None else ms.sum() / 1e3
+    return {
+        'count': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'throughput_per_s': len(ms) / wall if wall > 0 else float('inf')
+    }
+
+
+def time_calls(fn, items: list) -> dict:
+    """Time fn(item) for each item after a short untimed warm-up"""
+    for item in items[:WARMUP_QUERIES]:
+        fn(item)
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def time_concurrent(fn, items: list, concurrency: int) -> dict:
+    """Latency of fn(item) and overall throughput with concurrency worker threads"""
+    def timed(item):
+        start = time.perf_counter()
+        fn(item)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(timed, items))
+        wall = time.perf_counter() - start
+    return summarize(latencies, wall)
+
+
+def prepare_source(corpus: dict, source: str, workdir: str, results: dict):
+    """Write the corpus where RAGService will load it from"""
+    if source == 'json':
+        path = os.path.join(workdir, 'rag_data.json')
+        write_rag_json(corpus, path)
+        Config.CORPUS_DIR = os.path.join(workdir, 'no-corpus')
+        rag_service_module.hf_hub_download = lambda **kwargs: path
+        return
+
+    # As build_index does, from the in-memory columns
+    start = time.perf_counter()
+    metadata = MetadataStore.from_columns(corpus['metadata'])
+    language_indexes = build_language_indexes(
+        corpus['embeddings'], metadata, Config.ANN_MIN_DOCUMENTS, Config.ANN_LISTS, Config.EMBEDDING_STORAGE
+    )
+    Config.CORPUS_DIR = os.path.join(workdir, 'corpus')
+    write_corpus(Config.CORPUS_DIR, corpus['embeddings'], metadata, corpus['model_info'], language_indexes)
+    results['build_index'] = summarize([time.perf_counter() - start])
+
+
+def run_size(documents: int, args) -> dict:
+    """Every benchmark at one corpus size"""
+    languages = args.languages.split(',')
+    print(f"\n{documents} documents, {len(languages)} languages, dimension {args.dimension} ({args.source})")
+
+    corpus = generate_corpus(documents, languages, args.dimension, args.vocabulary, args.seed)
+    queries = sample_queries(corpus, args.queries, args.seed)
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='rag-benchmark-') as workdir:
+        prepare_source(corpus, args.source, workdir, results)
+        del corpus
+        gc.collect()
+
+        load_latencies = []
+        start = time.perf_counter()
+        service = RAGService(background=False)
+        load_latencies.append(time.perf_counter() - start)
+        if service.load_state['status'] != 'ready':
+            raise RuntimeError(f"Corpus failed to load: {service.load_state['error']}")
+        for _ in range(args.load_repeats - 1):
+            start = time.perf_counter()
+            service._load_rag_data()
+            load_latencies.append(time.perf_counter() - start)
+        results['load'] = summarize(load_latencies)
+        service.model = StubModel(args.model_latency / 1e3)
+
+        top_k = Config.DEFAULT_TOP_K
+        with service.pinned_corpus():
+            # Parsed from scratch: the shared query memo would turn repeats into lookups
+            query_parser.parse.cache_clear()
+            results['extract_terms'] = time_calls(
+                lambda item: service._extract_translation_terms(item[0]), queries
+            )
+            terms = {query: service._extract_translation_terms(query) for query, _ in queries}
+            results['direct_answer'] = time_calls(
+                lambda item: service._direct_answer(item[0], item[1], top_k, terms[item[0]]), queries
+            )
+            results['semantic'] = time_calls(
+                lambda item: service._get_relevant_contexts_semantic([item[0]], item[1], top_k), queries
+            )
+            results['hybrid'] = time_calls(
+                lambda item: service._get_relevant_contexts_hybrid([item[0]], item[1], top_k), queries
+            )
+            results['text'] = time_calls(
+                lambda item: service._get_relevant_context_text(item[0], item[1], top_k), queries
+            )
+            results['retrieve_context'] = time_calls(
+                lambda item: service._retrieve_context(item[0], item[1], top_k, terms[item[0]]), queries
+            )
+
+        complete = lambda item: service.get_completion(item[0], item[1], top_k, use_cache=False)  # noqa: E731
+        results['completion'] = time_calls(complete, queries)
+        results['completion_concurrent'] = time_concurrent(complete, queries, args.concurrency)
+
+        del service
+        gc.collect()
+
+    for name, stats in results.items():
+        print(f"  {name:22} p50 {stats['p50_ms']:9.3f}  p95 {stats['p95_ms']:9.3f}  "
+              f"p99 {stats['p99_ms']:9.3f} ms  {stats['throughput_per_s']:10.1f}/s")
+    return {'documents': documents, 'results': results}
+
+
+def git_commit() -> str:
+    """Short commit of the working tree, suffixed -dirty when it has changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(previous_path: str, current: dict):
+    """Print the p50/p95 change of every benchmark present in both result files"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    before = {run['documents']: run['results'] for run in previous['runs']}
+    print(f"\nChange against {previous.get('commit', previous_path)} (negative = faster)")
+    for run in current['runs']:
+        old_results = before.get(run['documents'])
+        if old_results is None:
+            continue
+        print(f"{run['documents']} documents")
+        for name, stats in run['results'].items():
+            old = old_results.get(name)
+            if old is None:
+                continue
+            changes = [
+                f"{key[:3]} {_change(old[key], stats[key]):+7.1f}%" for key in ('p50_ms', 'p95_ms')
+            ]
+            print(f"  {name:22} {'  '.join(changes)}")
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark RAGService on synthetic corpora')
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000', help='Comma-separated document counts')
+    parser.add_argument('--languages', default=','.join(Config.SUPPORTED_LANGUAGES))
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--vocabulary', type=int, default=5000, help='Words per language')
+    parser.add_argument('--source', choices=['binary', 'json'], default='binary',
+                        help='Load a binary corpus (as built by build_index) or rag_data.json')
+    parser.add_argument('--queries', type=int, default=200, help='Queries timed per benchmark')
+    parser.add_argument('--load-repeats', type=int, default=3)
+    parser.add_argument('--model-latency', type=float, default=50.0, help='Stub model latency in milliseconds')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads for completion_concurrent')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Results file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', metavar='FILE', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # Every concurrent call gets a generation slot, and nothing touches a shared cache file
+    Config.MAX_CONCURRENT_GENERATIONS = max(Config.MAX_CONCURRENT_GENERATIONS, args.concurrency)
+    Config.GENERATION_QUEUE_SIZE = max(Config.GENERATION_QUEUE_SIZE, args.concurrency)
+    Config.RESPONSE_CACHE_DB = None
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'settings': {name: getattr(Config, name) for name in RECORDED_SETTINGS},
+        'arguments': vars(args),
+        'runs': [run_size(int(size), args) for size in args.sizes.split(',')]
+    }
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Synthetic corpora and a stand-in model for offline benchmarks
+
+    python benchmarks/synthetic.py --documents 10000 --output /tmp/rag_data.json
+
+Documents are short phrases over a Zipf-distributed vocabulary per language,
+each with a gloss translation. A document's embedding is the sum of its word
+vectors plus noise, so semantic and lexical retrieval find the same neighbours
+as they do on the real corpus. Everything is derived from the seed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Config
+
+SYLLABLES = [c + v for c in 'bdfghjkmnprstwy' for v in 'aeiou'] + ['nd', 'mb', 'ng', 'aa', 'ee', 'oo']
+CATEGORIES = ['general', 'greetings', 'family', 'numbers', 'food', 'travel']
+MAX_WORDS = 4
+
+# Generation chunk: bounds the temporary (rows, dimension) sums at large sizes
+CHUNK_ROWS = 65536
+
+
+def make_vocabulary(size: int, rng: np.random.Generator) -> list:
+    """size distinct pseudo-words of two to four syllables"""
+    words = set()
+    while len(words) < size:
+        lengths = rng.integers(2, 5, size=size)
+        picks = rng.integers(0, len(SYLLABLES), size=(size, 4))
+        words.update(''.join(SYLLABLES[s] for s in row[:n]) for row, n in zip(picks, lengths))
+    return sorted(words)[:size]
+
+
+def generate_corpus(documents: int, languages: list = None, dimension: int = 384, vocabulary_size: int = 5000,
+                    seed: int = 0) -> dict:
+    """Synthetic corpus in the rag_data.json shape, with embeddings as a float32 array
+
+    metadata is returned as columns (phrase, translation, category, language);
+    records() turns them into the list of dicts of rag_data.json.
+    """
+    languages = languages or Config.SUPPORTED_LANGUAGES
+    rng = np.random.default_rng(seed)
+
+    words = make_vocabulary(vocabulary_size, rng)
+    glosses = make_vocabulary(vocabulary_size, rng)
+    word_vectors = rng.standard_normal((vocabulary_size, dimension)).astype(np.float32)
+    gloss_vectors = rng.standard_normal((vocabulary_size, dimension)).astype(np.float32)
+
+    zipf = 1.0 / np.arange(1, vocabulary_size + 1)
+    zipf /= zipf.sum()
+    phrase_ids = rng.choice(vocabulary_size, size=(documents, MAX_WORDS), p=zipf)
+    gloss_ids = rng.choice(vocabulary_size, size=(documents, MAX_WORDS), p=zipf)
+    phrase_lengths = rng.integers(1, MAX_WORDS + 1, size=documents)
+    gloss_lengths = rng.integers(1, MAX_WORDS + 1, size=documents)
+
+    embeddings = np.empty((documents, dimension), dtype=np.float32)
+    for start in range(0, documents, CHUNK_ROWS):
+        rows = slice(start, min(start + CHUNK_ROWS, documents))
+        block = 0.5 * rng.standard_normal((rows.stop - start, dimension)).astype(np.float32)
+        for k in range(MAX_WORDS):
+            block += word_vectors[phrase_ids[rows, k]] * (phrase_lengths[rows, None] > k)
+            block += 0.5 * gloss_vectors[gloss_ids[rows, k]] * (gloss_lengths[rows, None] > k)
+        embeddings[rows] = block
+
+    # Every language has its own words: prefix them so vocabularies do not overlap
+    language_of = rng.integers(0, len(languages), size=documents)
+    prefixes = [language[:2] for language in languages]
+    metadata = {
+        'phrase': [
+            ' '.join(prefixes[lang] + words[w] for w in ids[:n])
+            for ids, n, lang in zip(phrase_ids.tolist(), phrase_lengths.tolist(), language_of.tolist())
+        ],
+        'translation': [
+            ' '.join(glosses[w] for w in ids[:n]) for ids, n in zip(gloss_ids.tolist(), gloss_lengths.tolist())
+        ],
+        'category': [CATEGORIES[c] for c in rng.integers(0, len(CATEGORIES), size=documents).tolist()],
+        'language': [languages[lang] for lang in language_of.tolist()],
+    }
+
+    return {
+        'embeddings': embeddings,
+        'metadata': metadata,
+        'model_info': {'model_name': 'synthetic', 'dimension': dimension, 'seed': seed, 'documents': documents}
+    }
+
+
+def records(metadata: dict) -> list:
+    """Metadata columns as the list of dicts of rag_data.json"""
+    return [dict(zip(metadata, values)) for values in zip(*metadata.values())]
+
+
+def write_rag_json(corpus: dict, path: str):
+    """Write the corpus as rag_data.json"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'embeddings': corpus['embeddings'].tolist(),
+            'metadata': records(corpus['metadata']),
+            'model_info': corpus['model_info']
+        }, f, ensure_ascii=False)
+
+
+def sample_queries(corpus: dict, count: int, seed: int = 0) -> list:
+    """(query, language) pairs: corpus phrases and glosses in the usual question shapes, some misspelled"""
+    rng = np.random.default_rng(seed + 1)
+    metadata = corpus['metadata']
+    templates = ['{}', 'How do I say "{}"?', 'what is {} in {language}', "What does '{}' mean?", 'translate {}']
+    queries = []
+    for i in rng.integers(0, len(metadata['phrase']), size=count).tolist():
+        field = 'translation' if rng.random() < 0.6 else 'phrase'
+        text = metadata[field][i]
+        if rng.random() < 0.1 and len(text) > 5:
+            # Drop one letter to exercise the typo path
+            position = int(rng.integers(1, len(text) - 1))
+            text = text[:position] + text[position + 1:]
+        template = templates[int(rng.integers(0, len(templates)))]
+        language = metadata['language'][i]
+        queries.append((template.format(text, language=language), language))
+    return queries
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Deterministic stand-in for the generative model
+
+    Replies with a digest of the prompt after latency seconds; streams split
+    the reply into chunks spread over the same latency.
+    """
+
+    def __init__(self, latency: float = 0.0, chunks: int = 4):
+        self.latency = latency
+        self.chunks = chunks
+        self.calls = 0
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        text = 'Stub answer ' + hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency)
+        return StubResponse(text)
+
+    def _stream(self, text: str):
+        size = max(1, len(text) // self.chunks)
+        for start in range(0, len(text), size):
+            time.sleep(self.latency / self.chunks)
+            yield StubResponse(text[start:start + size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic rag_data.json')
+    parser.add_argument('--documents', type=int, default=10000)
+    parser.add_argument('--languages', default=','.join(Config.SUPPORTED_LANGUAGES))
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--vocabulary', type=int, default=5000, help='Words per language')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='rag_data.json')
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.documents, args.languages.split(','), args.dimension, args.vocabulary, args.seed)
+    write_rag_json(corpus, args.output)
+    print(f"{args.documents} documents, dimension {args.dimension} -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
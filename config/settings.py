@@ -21,17 +21,64 @@ class Config:
     DEFAULT_TOP_K = 3
     MAX_TOP_K = 10
     SUPPORTED_LANGUAGES = ['fulfulde', 'ghomala', 'english', 'french']
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '32'))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '8'))  # Parallel generation calls per process
+    ASYNC_MAX_CONCURRENT_GENERATIONS = int(os.getenv('ASYNC_MAX_CONCURRENT_GENERATIONS', '256'))  # ASGI mode
+    QUERY_MEMO_SIZE = int(os.getenv('QUERY_MEMO_SIZE', '4096'))  # Parsed queries memoised per process
+    
+    # Approximate nearest-neighbour (IVF) search for large languages
+    ANN_MIN_DOCUMENTS = int(os.getenv('ANN_MIN_DOCUMENTS', '100000'))  # Smaller languages stay exact; 0 = never build
+    ANN_LISTS = int(os.getenv('ANN_LISTS', '0'))  # Clusters per language, 0 = about 4 * sqrt(documents)
+    ANN_NPROBE = int(os.getenv('ANN_NPROBE', '16'))  # Lists scanned per query: higher = better recall, slower; 0 = exact
+    
+    # Compact embedding storage for the bulk similarity scan, re-ranked exactly in float32
+    EMBEDDING_STORAGE = os.getenv('EMBEDDING_STORAGE', 'float32')  # float32, float16 or int8
+    RERANK_SHORTLIST = int(os.getenv('RERANK_SHORTLIST', '50'))  # Candidates re-scored in float32 per query
+    
+    # Hybrid retrieval: BM25 and cosine scores over one candidate set, fused
+    RETRIEVAL_FUSION = os.getenv('RETRIEVAL_FUSION', 'weighted')  # weighted, rrf, or off (semantic, then text overlap)
+    HYBRID_SEMANTIC_WEIGHT = float(os.getenv('HYBRID_SEMANTIC_WEIGHT', '0.6'))
+    HYBRID_LEXICAL_WEIGHT = float(os.getenv('HYBRID_LEXICAL_WEIGHT', '0.4'))
+    HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', '50'))  # Best documents per signal that enter fusion
+    BM25_K1 = float(os.getenv('BM25_K1', '1.2'))
+    BM25_B = float(os.getenv('BM25_B', '0.75'))
+    RRF_K = int(os.getenv('RRF_K', '60'))
+    
+    # Typo tolerance: queries matching no vocabulary term are corrected within this many edits, 0 = off
+    FUZZY_MAX_EDITS = int(os.getenv('FUZZY_MAX_EDITS', '2'))
+    
+    # Answer exact dictionary matches from the corpus without calling the model
+    DIRECT_ANSWER_ENABLED = os.getenv('DIRECT_ANSWER_ENABLED', 'false').lower() == 'true'
+    
+    # Response cache settings
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '2048'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '86400'))  # seconds
+    RESPONSE_CACHE_DB = os.getenv('RESPONSE_CACHE_DB')  # Optional SQLite file shared by workers on a host
+    
+    # Semantic cache: answers reused across wordings with the same terms and sources
+    SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '2048'))
+    SEMANTIC_CACHE_SIMILARITY = float(os.getenv('SEMANTIC_CACHE_SIMILARITY', '0'))  # Query cosine to reuse, 0 = off
+    SEMANTIC_CACHE_RECENT = int(os.getenv('SEMANTIC_CACHE_RECENT', '512'))  # Query embeddings compared
     
     # File paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DATA_DIR = os.path.join(BASE_DIR, 'data')
     VECTOR_STORES_DIR = os.path.join(DATA_DIR, 'vector_stores')
+    CORPUS_DIR = os.getenv('CORPUS_DIR', os.path.join(DATA_DIR, 'corpus'))  # Built by app.services.build_index
+    CORPUS_VERIFY_CHECKSUMS = os.getenv('CORPUS_VERIFY_CHECKSUMS', 'false').lower() == 'true'
+    CORPUS_READY_TIMEOUT = float(os.getenv('CORPUS_READY_TIMEOUT', '10'))  # seconds a request waits for loading
+    READY_RETRY_AFTER = int(os.getenv('READY_RETRY_AFTER', '5'))  # Retry-After for 503s while loading
+    CORPUS_PRELOAD = os.getenv('CORPUS_PRELOAD', 'false').lower() == 'true'  # Load before fork (gunicorn.conf.py)
+    CORPUS_WATCH_INTERVAL = float(os.getenv('CORPUS_WATCH_INTERVAL', '0'))  # seconds between manifest checks, 0 = off
     
     # Embedding settings
     EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
     EMBEDDING_DIMENSION = 384
     
     # Security settings
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')  # Bearer token for /admin endpoints; unset disables them
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
     REQUEST_TIMEOUT = 30  # seconds
     
@@ -42,8 +89,19 @@ class Config:
     HF_REPO_ID = os.getenv('HF_REPO_ID', 'nde-dilan/nerala-rag-model')
     HF_TOKEN = os.getenv('HF_TOKEN')  # Optional for private repos
     
-    # Rate limiting
+    # Prometheus metrics on /metrics (per process)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Rate limiting: per-client token bucket on the completion routes, 0 = off
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '0'))  # Bucket size, 0 = RATE_LIMIT_PER_MINUTE
+    
+    # Load shedding: model generations in flight and waiting per process, beyond which requests get a 503
+    MAX_CONCURRENT_GENERATIONS = int(os.getenv('MAX_CONCURRENT_GENERATIONS', '4'))  # Threaded (WSGI) mode
+    GENERATION_QUEUE_SIZE = int(os.getenv('GENERATION_QUEUE_SIZE', '2'))  # Keep both below GUNICORN_THREADS
+    ASYNC_GENERATION_QUEUE_SIZE = int(os.getenv('ASYNC_GENERATION_QUEUE_SIZE', '512'))  # ASGI mode
+    GENERATION_QUEUE_TIMEOUT = float(os.getenv('GENERATION_QUEUE_TIMEOUT', '10'))  # Seconds waiting for a slot
+    OVERLOAD_RETRY_AFTER = int(os.getenv('OVERLOAD_RETRY_AFTER', '5'))  # Seconds, sent with the 503
     
     @staticmethod
     def validate_config():
@@ -0,0 +1,77 @@
+import sys
+import os
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+# Offline: the model is stubbed and nothing is downloaded
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+os.environ.setdefault('HF_HUB_OFFLINE', '1')
+
+import numpy as np
+import pytest
+
+from app.services.corpus_index import build_language_index, build_language_indexes
+from app.services.corpus_store import write_corpus
+from config.settings import Config
+from synthetic import StubModel
+
+# Small dictionary served by make_rag_service unless a test brings its own
+DICTIONARY = [
+    {'phrase': 'jam', 'translation': 'hello', 'category': 'greetings', 'language': 'fulfulde'},
+    {'phrase': 'jam waali', 'translation': 'good night', 'category': 'greetings', 'language': 'fulfulde'},
+    {'phrase': 'ndiyam', 'translation': 'water', 'category': 'general', 'language': 'fulfulde'},
+    {'phrase': 'yaaye', 'translation': 'mother', 'category': 'family', 'language': 'fulfulde'},
+    {'phrase': 'a jaraama', 'translation': 'thank you', 'category': 'greetings', 'language': 'fulfulde'},
+    {'phrase': 'nyaamdu', 'translation': 'food', 'category': 'food', 'language': 'fulfulde'},
+    {'phrase': 'mbə̀', 'translation': 'hello', 'category': 'greetings', 'language': 'ghomala'},
+    {'phrase': 'ŋkǎ', 'translation': 'water', 'category': 'general', 'language': 'ghomala'},
+    {'phrase': 'bonjour', 'translation': 'hello', 'category': 'greetings', 'language': 'french'},
+    {'phrase': 'eau', 'translation': 'water', 'category': 'general', 'language': 'french'},
+]
+
+
+@pytest.fixture
+def make_language_index():
+    """Build a fulfulde LanguageIndex over metadata records, with seeded random embeddings"""
+    def make(metadata: list, dimension: int = 8, **kwargs):
+        embeddings = np.random.default_rng(0).standard_normal((len(metadata), dimension)).astype(np.float32)
+        return build_language_index('fulfulde', np.arange(len(metadata)), embeddings, metadata, **kwargs)
+    return make
+
+
+@pytest.fixture
+def write_test_corpus(tmp_path, monkeypatch):
+    """Write a binary corpus where RAGService loads it from (Config.CORPUS_DIR); returns its manifest"""
+    monkeypatch.setattr(Config, 'CORPUS_DIR', str(tmp_path / 'corpus'))
+
+    def write(metadata: list = DICTIONARY, embeddings=None, dimension: int = 16, seed: int = 0):
+        if embeddings is None:
+            embeddings = np.random.default_rng(seed).standard_normal((len(metadata), dimension)).astype(np.float32)
+        language_indexes = build_language_indexes(
+            embeddings, metadata, Config.ANN_MIN_DOCUMENTS, Config.ANN_LISTS, Config.EMBEDDING_STORAGE
+        )
+        return write_corpus(Config.CORPUS_DIR, embeddings, metadata, {'model_name': 'test'}, language_indexes)
+    return write
+
+
+@pytest.fixture
+def make_rag_service(write_test_corpus, monkeypatch):
+    """RAGService loaded from a test corpus, with the model replaced by a stub
+
+    Keyword settings override Config attributes for the test, before the
+    corpus is built; the response cache stays in memory.
+    """
+    from app.services.rag_service import RAGService
+
+    def make(metadata: list = DICTIONARY, embeddings=None, model_latency: float = 0.0, **settings):
+        monkeypatch.setattr(Config, 'RESPONSE_CACHE_DB', None)
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value)
+        write_test_corpus(metadata, embeddings)
+
+        service = RAGService(background=False)
+        assert service.is_ready(), service.load_state['error']
+        service.model = StubModel(model_latency)
+        return service
+    return make
@@ -0,0 +1,43 @@
+"""Gunicorn configuration with a corpus shared by all workers
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app) with CORPUS_PRELOAD set,
+so RAGService loads the corpus synchronously before any worker exists. The
+workers are forked from that process and inherit the memory-mapped arrays and
+the metadata copy-on-write: host memory holds one corpus instead of one per
+worker. Build the corpus with app.services.build_index so the arrays are
+file-backed and shared through the page cache.
+"""
+import gc
+import multiprocessing
+import os
+
+# Must be set before the app (and config.settings) is imported
+os.environ.setdefault('CORPUS_PRELOAD', 'true')
+
+wsgi_app = 'app:create_app()'
+preload_app = True
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Generation calls block on the upstream model, so each worker runs threads
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+
+accesslog = '-'
+errorlog = '-'
+
+
+def pre_fork(server, worker):
+    """Freeze the preloaded objects so the workers' collector never writes to their pages"""
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Start the corpus watcher (CORPUS_WATCH_INTERVAL) in each worker; threads do not survive fork"""
+    from app.api.routes import rag_service
+    rag_service.start_watching()
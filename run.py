@@ -30,10 +30,15 @@ def main():
     port = int(os.getenv('PORT', 8000))
     debug = env == 'development'
     
-    if env == 'production':
+    if os.getenv('SERVER_MODE') == 'asgi':
+        # Async serving path: completion routes on the event loop, no thread per request
+        import uvicorn
+        app.logger.info(f"Starting ASGI server on {host}:{port}")
+        uvicorn.run('app.asgi:app', host=host, port=port, log_level='info')
+    elif env == 'production':
         # Production settings
         app.logger.info(f"Starting production server on {host}:{port}")
-        # Use a production WSGI server like Gunicorn in production
+        # Use Gunicorn in production: gunicorn -c gunicorn.conf.py (workers share one corpus)
         app.run(host=host, port=port, debug=False, threaded=True)
     else:
         # Development settings
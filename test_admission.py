@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.admission import GenerationGate, Overloaded, RateLimited, TokenBucketLimiter
+from app.services.async_model import AsyncModelClient
+
+
+def test_token_bucket_limits_each_client():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=2)
+    limiter.check('a')
+    limiter.check('a')
+    with pytest.raises(RateLimited) as raised:
+        limiter.check('a')
+    assert 0 < raised.value.retry_after <= 1
+    assert raised.value.retry_after_header == '1'
+    limiter.check('b')
+
+    stats = limiter.stats()
+    assert (stats['allowed'], stats['limited'], stats['clients']) == (3, 1, 2)
+
+
+def test_disabled_limiter_admits_everything():
+    limiter = TokenBucketLimiter(rate_per_minute=0)
+    for _ in range(100):
+        limiter.check('a')
+
+
+def test_gate_sheds_beyond_the_queue():
+    gate = GenerationGate(max_concurrent=1, max_waiting=1, wait_timeout=5, retry_after=3)
+    release = threading.Event()
+
+    def hold():
+        with gate.slot():
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    waiter = threading.Thread(target=hold)
+    holder.start()
+    while gate.in_flight == 0:
+        time.sleep(0.001)
+    waiter.start()
+    while gate.waiting == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(Overloaded) as raised:
+        with gate.slot():
+            pass
+    assert raised.value.status == 503 and raised.value.retry_after == 3
+
+    release.set()
+    holder.join()
+    waiter.join()
+    assert gate.stats()['admitted'] == 2 and gate.stats()['rejected'] == 1
+
+
+def test_gate_wait_times_out():
+    gate = GenerationGate(max_concurrent=1, max_waiting=1, wait_timeout=0.01, retry_after=1)
+    with gate.slot():
+        with pytest.raises(Overloaded):
+            with gate.slot():
+                pass
+    assert gate.stats()['timeouts'] == 1
+
+
+def test_async_client_sheds_beyond_the_queue():
+    class SlowModel:
+        async def generate_content_async(self, prompt):
+            await asyncio.sleep(0.05)
+            return type('Response', (), {'text': prompt})()
+
+    async def run():
+        client = AsyncModelClient(max_concurrency=1, max_waiting=1)
+        return await asyncio.gather(
+            *(client.generate_text(SlowModel(), str(i)) for i in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert results[:2] == ['0', '1']
+    assert isinstance(results[2], Overloaded)
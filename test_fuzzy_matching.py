@@ -0,0 +1,37 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.corpus_index import edit_distance
+
+METADATA = [
+    {'phrase': 'jam', 'translation': 'hello', 'language': 'fulfulde'},
+    {'phrase': 'ndiyam', 'translation': 'water', 'language': 'fulfulde'},
+    {'phrase': 'bonjour', 'translation': 'hello friend', 'language': 'fulfulde'},
+    {'phrase': 'yaaye', 'translation': 'mother', 'language': 'fulfulde'},
+]
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance('helo', 'hello', 2) == 1
+    assert edit_distance('bonjor', 'bonjour', 2) == 1
+    assert edit_distance('water', 'mother', 1) == 2
+    assert edit_distance('a', 'abcdef', 2) == 3
+
+
+def test_misspelled_words_are_corrected(make_language_index):
+    index = make_language_index(METADATA)
+    assert index.correct_words({'helo', 'bonjor', 'mothr'}, 2) == {'hello', 'bonjour', 'mother'}
+    assert index.correct_words({'"water"?'}, 2) == {'water'}
+
+
+def test_short_and_distant_words_are_kept(make_language_index):
+    index = make_language_index(METADATA)
+    assert index.correct_words({'ja', 'zzzzzz'}, 2) == {'ja', 'zzzzzz'}
+    assert index.correct_words({'helo'}, 0) == {'helo'}
+
+
+def test_corrected_words_reach_the_postings(make_language_index):
+    index = make_language_index(METADATA)
+    docs, _ = index.overlap_counts(index.correct_words({'helo'}, 2), 'translation')
+    assert docs.tolist() == [0, 2]
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from app.services.corpus_index import fuse_scores
+
+METADATA = [
+    {'phrase': 'jam waali', 'translation': 'good night', 'language': 'fulfulde'},
+    {'phrase': 'jam', 'translation': 'peace', 'language': 'fulfulde'},
+    {'phrase': 'jam nder suudu', 'translation': 'peace in the house', 'language': 'fulfulde'},
+    {'phrase': 'ndiyam', 'translation': 'water', 'language': 'fulfulde'},
+]
+
+
+def test_bm25_prefers_rare_terms_and_short_documents(make_language_index):
+    index = make_language_index(METADATA)
+    docs, scores = index.bm25_scores({'jam', 'waali'})
+    assert docs.tolist() == [0, 1, 2]
+    assert scores.argmax() == 0          # matches the rare 'waali' too
+    assert scores[1] > scores[2]         # same match, shorter document
+
+    docs, scores = index.bm25_scores({'unknown'})
+    assert len(docs) == 0 and len(scores) == 0
+
+
+def test_weighted_fusion_combines_both_signals():
+    semantic = np.array([0.9, 0.5, 0.4])
+    lexical = np.array([0.0, 4.0, 2.0])
+    fused = fuse_scores(semantic, lexical, 'weighted', 0.5, 0.5)
+    assert np.allclose(fused, [0.45, 0.75, 0.45])
+
+
+def test_rrf_gives_no_lexical_share_without_a_match():
+    semantic = np.array([0.9, 0.5])
+    lexical = np.array([0.0, 1.0])
+    fused = fuse_scores(semantic, lexical, 'rrf', 1.0, 1.0, rrf_k=0)
+    assert np.allclose(fused, [1.0, 0.5 + 1.0])
+
+
+def test_unknown_fusion_method():
+    with pytest.raises(ValueError):
+        fuse_scores(np.zeros(1), np.zeros(1), 'max')
@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from app.services.metrics import MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('stage_seconds', 'Stage latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, 'retrieval')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE stage_seconds histogram' in lines
+    assert 'stage_seconds_bucket{stage="retrieval",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="retrieval",le="1.0"} 3' in lines
+    assert 'stage_seconds_bucket{stage="retrieval",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="retrieval"} 4' in lines
+    assert 'stage_seconds_sum{stage="retrieval"} 6.05' in lines
+
+
+def test_timer_observes_when_the_block_raises():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('stage_seconds', 'Stage latency', ('stage',))
+    with pytest.raises(ValueError):
+        with histogram.time('generate'):
+            raise ValueError
+    assert 'stage_seconds_count{stage="generate"} 1' in registry.render()
+
+
+def test_counters_gauges_and_label_escaping():
+    registry = MetricsRegistry()
+    counter = registry.counter('fallbacks_total', 'Fallbacks', ('language',))
+    counter.inc('fulfulde')
+    counter.inc('fulfulde')
+    registry.gauge('corpus_info', 'Corpus', lambda: [({'version': 'a"b'}, 1)])
+    registry.gauge('broken', 'Failing callback', lambda: 1 / 0)
+
+    text = registry.render()
+    assert 'fallbacks_total{language="fulfulde"} 2.0' in text
+    assert 'corpus_info{version="a\\"b"} 1' in text
+    assert '# broken unavailable' in text
+    assert registry.counter('fallbacks_total', 'Fallbacks', ('language',)) is counter
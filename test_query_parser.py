@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from app.services.query_parser import ParsedQuery, QueryParser, query_parser
+from config.settings import Config
+
+# Golden set: query -> (ranked terms, target language, source language)
+GOLDEN = [
+    ('How do I say hello?', ('hello',), None, None),
+    ('goodbye', (), None, None),
+    ('hello water', (), None, None),
+    ('translate "friend"', ('friend',), None, None),
+    ('what is merci', ('merci',), None, None),
+    ('mother in fulfulde', ('mother',), 'fulfulde', None),
+    ('how to say good morning friend?', ('good morning friend',), None, None),
+    ('How do you say "Good Morning" in Fulfulde?',
+     ('Good Morning', 'good morning" in fulfulde', 'how do you say "good morning'), 'fulfulde', None),
+    ("What does 'jam' mean?", ('jam',), None, None),
+    ('what is water in fulfulde', ('water', 'water in fulfulde', 'what is water'), 'fulfulde', None),
+    ('fulfulde word for water', ('water',), 'fulfulde', None),
+    ('French for bread?', ('bread',), 'french', None),
+    ('meaning of sannu', ('sannu',), None, None),
+    ('define ndiyam', ('ndiyam',), None, None),
+    ('translate water from english to ghomala', ('water from english to ghomala',), 'ghomala', 'english'),
+    ("say 'thank you' please", ('thank you', "thank you' please"), None, None),
+    ('how to translate I love you', ('i love you',), None, None),
+    ('What is the Ghomala word for market?', ('the ghomala word for market', 'market'), 'ghomala', None),
+    ('In English, what is "mbolo"?', ('mbolo',), 'english', None),
+    ('how do you say "A"?', (), None, None),
+    ('Translate: "good night" into french', ('good night',), 'french', None),
+    ('WHAT IS LOVE', ('love',), None, None),
+    ('', (), None, None),
+]
+
+
+@pytest.mark.parametrize('query, terms, target_language, source_language', GOLDEN)
+def test_golden_queries(query, terms, target_language, source_language):
+    assert query_parser.parse(query) == ParsedQuery(terms, target_language, source_language)
+
+
+def test_parse_is_memoised():
+    parser = QueryParser(Config.SUPPORTED_LANGUAGES, memo_size=8)
+    first = parser.parse('how do you say water?')
+    assert parser.parse('how do you say water?') is first
+    assert parser.parse.cache_info().hits == 1
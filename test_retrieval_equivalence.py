@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+LANGUAGES = ['fulfulde', 'ghomala']
+WORDS = ['jam', 'waali', 'ndiyam', 'yaaye', 'hello', 'water', 'mother', 'good', 'night', 'food', 'house', 'friend']
+TOP_K = 5
+
+
+def make_corpus(documents: int = 300, dimension: int = 16):
+    """Metadata over a small vocabulary, so many documents share tokens and overlap scores tie"""
+    rng = np.random.default_rng(7)
+    metadata = [
+        {
+            'phrase': ' '.join(rng.choice(WORDS, size=rng.integers(1, 4))),
+            'translation': ' '.join(rng.choice(WORDS, size=rng.integers(1, 4))),
+            'category': 'general',
+            'language': LANGUAGES[i % len(LANGUAGES)],
+        }
+        for i in range(documents)
+    ]
+    return metadata, rng.standard_normal((documents, dimension)).astype(np.float32)
+
+
+def queries():
+    rng = np.random.default_rng(11)
+    single = list(WORDS)
+    pairs = [' '.join(rng.choice(WORDS, size=2)) for _ in range(20)]
+    return single + pairs + ['how do I say water?', 'Jam Waali', 'unknown words only', 'hello unknown']
+
+
+# The baseline scorers, as they were before the inverted index (float64, a Python loop per document)
+
+def reference_query_embedding(embeddings, metadata, indices, query):
+    query_words = set(query.lower().split())
+    matching = []
+    for idx in indices:
+        doc_words = set((metadata[idx]['phrase'] + ' ' + metadata[idx]['translation']).lower().split())
+        overlap = len(query_words.intersection(doc_words))
+        if overlap > 0:
+            matching.append((overlap / len(query_words), embeddings[idx]))
+    if matching:
+        total = sum(weight for weight, _ in matching)
+        return sum(weight * embedding for weight, embedding in matching) / total
+    return np.mean(embeddings[indices], axis=0)
+
+
+def reference_semantic(embeddings, metadata, indices, query, top_k):
+    lang_embeddings = embeddings[indices]
+    query_embedding = reference_query_embedding(embeddings, metadata, indices, query)
+    query_norm = query_embedding / (np.linalg.norm(query_embedding) + 1e-8)
+    doc_norms = lang_embeddings / (np.linalg.norm(lang_embeddings, axis=1, keepdims=True) + 1e-8)
+    similarities = np.dot(doc_norms, query_norm)
+    top = np.argsort(similarities)[-top_k:][::-1]
+    return [(metadata[indices[i]]['phrase'], float(similarities[i])) for i in top if similarities[i] > 0.1]
+
+
+def reference_text(metadata, indices, query, top_k):
+    query_words = set(query.lower().split())
+    scored = []
+    for idx in indices:
+        phrase_score = len(query_words & set(metadata[idx]['phrase'].lower().split())) / max(len(query_words), 1)
+        translation_score = len(query_words & set(metadata[idx]['translation'].lower().split())) / max(len(query_words), 1)
+        score = max(phrase_score, translation_score)
+        if score > 0:
+            scored.append((score, metadata[idx]))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [(meta['phrase'], score) for score, meta in scored[:top_k]]
+
+
+@pytest.fixture
+def service(make_rag_service):
+    metadata, embeddings = make_corpus()
+    # Exact float32 scan, no fusion and no typo correction: the settings under which results match the baseline
+    rag_service = make_rag_service(
+        metadata, embeddings, RETRIEVAL_FUSION='off', FUZZY_MAX_EDITS=0, EMBEDDING_STORAGE='float32',
+        ANN_MIN_DOCUMENTS=0
+    )
+    return rag_service, metadata, embeddings.astype(np.float64)
+
+
+@pytest.mark.parametrize('language', LANGUAGES)
+def test_semantic_retrieval_matches_the_baseline(service, language):
+    rag_service, metadata, embeddings = service
+    indices = [i for i, meta in enumerate(metadata) if meta['language'] == language]
+    for query in queries():
+        expected = reference_semantic(embeddings, metadata, indices, query, TOP_K)
+        actual = rag_service._get_relevant_context_semantic(query, language, TOP_K)
+        assert [item['phrase'] for item in actual] == [phrase for phrase, _ in expected], query
+        assert np.allclose([item['score'] for item in actual], [score for _, score in expected], atol=1e-5), query
+
+
+@pytest.mark.parametrize('language', LANGUAGES)
+def test_text_retrieval_matches_the_baseline(service, language):
+    rag_service, metadata, _ = service
+    indices = [i for i, meta in enumerate(metadata) if meta['language'] == language]
+    for query in queries():
+        expected = reference_text(metadata, indices, query, TOP_K)
+        actual = rag_service._get_relevant_context_text(query, language, TOP_K)
+        assert [(item['phrase'], item['score']) for item in actual] == expected, query
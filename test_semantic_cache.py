@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app.services.semantic_cache import SemanticCache, make_semantic_key
+
+SCOPE = ('fulfulde', 3, 'v1')
+ANSWER = {'response': 'jam', 'sources': ['jam']}
+
+
+def test_same_terms_and_sources_share_an_answer():
+    cache = SemanticCache(max_entries=8, ttl_seconds=60)
+    cache.set(SCOPE, make_semantic_key(['Hello'], [4, 1, 7]), ANSWER)
+
+    assert cache.get(SCOPE, make_semantic_key(['hello'], [4, 1, 7])) == ANSWER
+    assert cache.get(SCOPE, make_semantic_key(['hello'], [1, 4, 7])) is None
+    assert cache.get(('fulfulde', 3, 'v2'), make_semantic_key(['hello'], [4, 1, 7])) is None
+
+    stats = cache.stats()
+    assert (stats['source_hits'], stats['misses']) == (1, 2)
+
+
+def test_similar_embeddings_hit_above_the_threshold():
+    cache = SemanticCache(max_entries=8, ttl_seconds=60, similarity_threshold=0.95, recent_embeddings=4)
+    cache.set(SCOPE, make_semantic_key(['hello'], [4]), ANSWER, embedding=np.array([1.0, 0.0, 0.0]))
+
+    assert cache.get(SCOPE, embedding=np.array([2.0, 0.1, 0.0])) == ANSWER
+    assert cache.get(SCOPE, embedding=np.array([1.0, 1.0, 0.0])) is None
+    assert cache.get(('ghomala', 3, 'v1'), embedding=np.array([1.0, 0.0, 0.0])) is None
+    assert cache.stats()['similar_hits'] == 1
+
+
+def test_size_is_bounded():
+    cache = SemanticCache(max_entries=2, ttl_seconds=60, similarity_threshold=0.5, recent_embeddings=2)
+    for i in range(3):
+        cache.set(SCOPE, make_semantic_key(['w%d' % i], [i]), {'response': str(i), 'sources': []},
+                  embedding=np.eye(3)[i])
+
+    assert cache.get(SCOPE, make_semantic_key(['w0'], [0])) is None
+    assert cache.get(SCOPE, embedding=np.eye(3)[0]) is None
+    assert cache.get(SCOPE, embedding=np.eye(3)[2])['response'] == '2'
+    assert cache.stats()['entries'] == 2
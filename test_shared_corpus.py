@@ -0,0 +1,114 @@
+import sys
+import os
+import gc
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from app.services.corpus_index import build_language_indexes
+from app.services.corpus_store import write_corpus
+from config.settings import Config
+
+WORKERS = 3
+DOCUMENTS = 40000
+DIMENSION = 384
+LANGUAGES = ['fulfulde', 'ghomala', 'english', 'french']
+WORDS = ['hello', 'water', 'goodbye', 'thanks', 'food', 'house', 'friend', 'morning', 'night', 'market']
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork') or not os.path.exists('/proc/self/smaps_rollup'),
+    reason='needs fork() and /proc/self/smaps_rollup (Linux)'
+)
+
+
+def unique_rss_kb() -> int:
+    """Memory only this process maps (USS): private clean + private dirty pages"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def build_synthetic_corpus(corpus_dir):
+    """Write a corpus large enough that a per-worker copy would dominate RSS"""
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((DOCUMENTS, DIMENSION), dtype=np.float32)
+    metadata = [
+        {
+            'phrase': ' '.join(rng.choice(WORDS, size=2)),
+            'translation': f'w{i % 5000} w{(i * 7) % 5000}',
+            'category': 'general',
+            'language': LANGUAGES[i % len(LANGUAGES)],
+        }
+        for i in range(DOCUMENTS)
+    ]
+    write_corpus(str(corpus_dir), embeddings, metadata, {'name': 'synthetic'},
+                 build_language_indexes(embeddings, metadata))
+
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(corpus_dir) for name in names
+    ) // 1024
+
+
+def serve_queries(rag_service):
+    """What a worker does per request, minus the model call"""
+    for i in range(200):
+        query = f"how do I say {WORDS[i % len(WORDS)]}?"
+        language = LANGUAGES[i % len(LANGUAGES)]
+        rag_service._retrieve_context(query, language, 3, rag_service._extract_translation_terms(query))
+
+
+def test_preforked_workers_share_corpus(tmp_path, monkeypatch):
+    """Workers forked after a preload keep only a small fraction of the corpus as unique memory"""
+    corpus_kb = build_synthetic_corpus(tmp_path / 'corpus')
+
+    monkeypatch.setattr(Config, 'CORPUS_DIR', str(tmp_path / 'corpus'))
+    monkeypatch.setattr(Config, 'GEMINI_API_KEY', Config.GEMINI_API_KEY or 'test-key')
+    monkeypatch.setattr(Config, 'RESPONSE_CACHE_ENABLED', False)
+
+    from app.services.rag_service import RAGService
+
+    # Same sequence as gunicorn.conf.py: preload in the master, freeze, fork
+    rag_service = RAGService(background=False)
+    assert rag_service.is_ready()
+    gc.freeze()
+
+    workers = []
+    try:
+        for _ in range(WORKERS):
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                code = 0
+                try:
+                    serve_queries(rag_service)
+                    os.write(write_fd, json.dumps({'unique_kb': unique_rss_kb()}).encode())
+                except BaseException:
+                    code = 1
+                finally:
+                    os._exit(code)
+            os.close(write_fd)
+            workers.append((pid, read_fd))
+
+        results = []
+        for pid, read_fd in workers:
+            with os.fdopen(read_fd, 'rb') as f:
+                payload = f.read()
+            _, status = os.waitpid(pid, 0)
+            assert os.WEXITSTATUS(status) == 0, 'worker failed while serving queries'
+            results.append(json.loads(payload)['unique_kb'])
+    finally:
+        gc.unfreeze()
+
+    print(f"\ncorpus on disk: {corpus_kb} kB, unique RSS per worker: {results} kB")
+    for unique_kb in results:
+        assert unique_kb < corpus_kb * 0.25, (
+            f"worker keeps {unique_kb} kB of unique memory for a {corpus_kb} kB corpus"
+        )